@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# agregados.py
+
+# Importar as bibliotecas necessárias
+import sys
+import threading
+from sqlalchemy import *
+import cache
+import disponibilidade
+from db import Base, Vendas, Carro, obter_engine, filtro_ano, transmitir, db_backend, tabela_sincronizacao
+
+sequencia_agregado = Sequence('vendas_agregadas_id_agregado_seq')
+
+# Tabela com as vendas pré-agregadas por marca, país sede e ano.
+# Os callbacks leem desta tabela, cujo tamanho depende do número de marcas e não do número de vendas.
+class VendasAgregadas(Base):
+    __tablename__ = 'vendas_agregadas'
+
+    # Sequência explícita (a mesma criada pelo SERIAL do PostgreSQL), também suportada pelo DuckDB
+    id_agregado = Column(INTEGER, sequencia_agregado, server_default=sequencia_agregado.next_value(), primary_key=True)
+    marca = Column(VARCHAR(50))
+    pais_sede = Column(String)
+    ano = Column(INTEGER)
+    total_vendas = Column(BIGINT, nullable=False)
+    valor_total = Column(NUMERIC(precision=16, scale=2))
+
+    __table_args__ = (
+        Index('ix_vendas_agregadas_ano_pais', 'ano', 'pais_sede'),
+        Index('ix_vendas_agregadas_pais_ano', 'pais_sede', 'ano'),
+    )
+
+# Consulta que agrega as vendas a partir das tabelas vendas e carros
+def consulta_agregacao():
+    ano = cast(extract('year', Vendas.data_venda), INTEGER)
+    return (
+        select(
+            Carro.marca,
+            Carro.pais_sede,
+            ano.label('ano'),
+            func.count(Vendas.id_venda).label('total_vendas'),
+            func.sum(Vendas.valor_venda).label('valor_total'))
+        .select_from(Carro)
+        .join(Vendas, Vendas.id_carro == Carro.id_carro)
+        .group_by(Carro.marca, Carro.pais_sede, ano)
+    )
+
+# Recalcula a tabela de agregados em uma única transação.
+# Enquanto a transação não termina, os callbacks continuam lendo os dados anteriores.
+# Com um ano informado, recalcula apenas esse ano lendo vendas por intervalo de data_venda.
+# Por padrão usa o banco do dashboard; informe engine para atualizar outro banco (por exemplo, na sincronização do DuckDB).
+def atualizar_agregado(ano=None, engine=None):
+    colunas = ['marca', 'pais_sede', 'ano', 'total_vendas', 'valor_total']
+    remocao = delete(VendasAgregadas)
+    consulta = consulta_agregacao()
+    if ano is not None:
+        remocao = remocao.where(VendasAgregadas.ano == int(ano))
+        consulta = consulta.where(filtro_ano(Vendas.data_venda, ano))
+
+    with (engine or obter_engine()).begin() as conexao:
+        conexao.execute(remocao)
+        conexao.execute(insert(VendasAgregadas).from_select(colunas, consulta))
+
+# Cria a tabela de agregados e a popula na primeira execução
+def criar_agregado(engine=None):
+    engine = engine or obter_engine()
+    if not inspect(engine).has_table(VendasAgregadas.__tablename__):
+        VendasAgregadas.__table__.create(engine)
+        atualizar_agregado(engine=engine)
+
+# Monta os filtros de ano e país sede sobre a tabela de agregados
+def filtros_agregado(ano_selecionado=None, pais_selecionado=None):
+    filtros = []
+    if ano_selecionado and ano_selecionado != 'todos':
+        filtros.append(VendasAgregadas.ano == int(ano_selecionado))
+    if pais_selecionado and pais_selecionado != 'todos':
+        filtros.append(VendasAgregadas.pais_sede == pais_selecionado)
+    return filtros
+
+# Soma das vendas agregadas, convertida para inteiro
+total_vendas_agregado = cast(func.sum(VendasAgregadas.total_vendas), BIGINT)
+
+# Níveis de agrupamento retornados por GROUPING(marca, pais_sede) na consulta de resumo
+NIVEL_MARCA_PAIS = 0
+NIVEL_MARCA = 1
+NIVEL_TOTAL = 3
+
+# Resumo das vendas para os filtros selecionados em uma única consulta com GROUPING SETS:
+# vendas por marca e país sede (gráfico), vendas por marca (tabela) e total geral.
+def resumo_vendas(ano_selecionado, pais_selecionado):
+    nivel = func.grouping(VendasAgregadas.marca, VendasAgregadas.pais_sede).label('nivel')
+    consulta = (
+        select(
+        VendasAgregadas.marca,
+        VendasAgregadas.pais_sede,
+        nivel,
+        total_vendas_agregado
+        .label('total_vendas'))
+        .filter(*filtros_agregado(ano_selecionado, pais_selecionado))
+        .group_by(func.grouping_sets(
+            tuple_(VendasAgregadas.marca, VendasAgregadas.pais_sede),
+            tuple_(VendasAgregadas.marca),
+            tuple_()
+        ))
+        .order_by(nivel, total_vendas_agregado.desc(), VendasAgregadas.marca)
+    )
+
+    # As linhas são transmitidas em lotes do cursor no servidor e separadas por nível à medida que chegam
+    vendas_marca_pais, vendas_marca, total_geral = [], [], None
+    for marca, pais, nivel_linha, total in transmitir(consulta):
+        if nivel_linha == NIVEL_MARCA_PAIS:
+            vendas_marca_pais.append((marca, pais, total))
+        elif nivel_linha == NIVEL_MARCA:
+            vendas_marca.append((marca, total))
+        elif nivel_linha == NIVEL_TOTAL:
+            total_geral = total
+
+    return vendas_marca_pais, vendas_marca, total_geral
+
+# Índice de disponibilidade ano <-> país sede montado a partir dos pares distintos da tabela de agregados
+# e reconstruído quando a marca d'água dos agregados muda
+_indice = None
+_marca_indice = None
+_trava_indice = threading.Lock()
+
+def pares_disponiveis():
+    with obter_engine().connect() as conexao:
+        yield from transmitir(
+            select(VendasAgregadas.ano, VendasAgregadas.pais_sede).distinct(), conexao=conexao
+        )
+
+def obter_indice_disponibilidade():
+    global _indice, _marca_indice
+    marca = cache.cache_resultados.marca_dagua_atual()
+    if _indice is None or marca != _marca_indice:
+        with _trava_indice:
+            if _indice is None or marca != _marca_indice:
+                _indice = disponibilidade.IndiceDisponibilidade(pares_disponiveis())
+                _marca_indice = marca
+    return _indice
+
+# Opções do dropdown de países sede com vendas no ano selecionado
+def opcoes_paises(ano_selecionado):
+    return obter_indice_disponibilidade().opcoes_paises(ano_selecionado)
+
+# Opções do dropdown de anos com vendas no país selecionado
+def opcoes_anos(pais_selecionado):
+    return obter_indice_disponibilidade().opcoes_anos(pais_selecionado)
+
+# Marca d'água dos dados vistos pelo dashboard, usada para invalidar o cache de resultados.
+# Cada atualização reinsere as linhas da tabela de agregados, então o maior id_agregado
+# muda sempre que novas vendas passam a fazer parte dos agregados. No DuckDB, cada sincronização monta
+# um arquivo novo e a sequência recomeça, então o momento da sincronização também faz parte da marca d'água.
+def marca_dagua():
+    colunas = [func.max(VendasAgregadas.id_agregado), func.count()]
+    if db_backend == 'duckdb':
+        colunas.append(select(func.max(tabela_sincronizacao.c.sincronizado_em)).scalar_subquery())
+    with obter_engine().connect() as conexao:
+        return tuple(conexao.execute(select(*colunas).select_from(VendasAgregadas)).one())
+
+# Executado periodicamente (por exemplo via cron) para manter os agregados atualizados
+# (python agregados.py [ano])
+if __name__ == '__main__':
+    atualizar_agregado(*sys.argv[1:2])
@@ -0,0 +1,312 @@
+// painel_cliente.js
+
+// Modo cliente do dashboard (DASH_MODO=cliente): o navegador recebe uma única vez os agregados
+// (marca, país sede, ano) codificados em arrays (fontes.dados_cliente) e calcula a cada filtro o gráfico
+// de rede, a tabela de vendas, o total geral e as opções dos dropdowns, sem requisições ao servidor.
+// As funções seguem funcoes.py e layout_grafo.py, para que os dois modos exibam o mesmo painel.
+
+(function () {
+
+    // Texto de um valor como em str() do Python (null vira "None")
+    function texto(valor) {
+        return valor === null || valor === undefined ? 'None' : String(valor);
+    }
+
+    // Comparação de valores que podem ser nulos (nulos por último), como layout_grafo.chave_ordem
+    function compararValores(a, b) {
+        if ((a === null) !== (b === null)) {
+            return a === null ? 1 : -1;
+        }
+        const textoA = texto(a);
+        const textoB = texto(b);
+        return textoA < textoB ? -1 : (textoA > textoB ? 1 : 0);
+    }
+
+    // Ids dos nós do gráfico de rede (funcoes.id_pais, id_marca, id_total e id_outras_marcas)
+    function idPais(pais) { return 'pais:' + texto(pais); }
+    function idMarca(marca) { return 'marca:' + texto(marca); }
+    function idTotal(marca, pais) { return 'total:' + texto(pais) + ':' + texto(marca); }
+    function idOutrasMarcas(pais) { return 'outras:' + texto(pais); }
+    function ehOutrasMarcas(marca) { return marca !== null && typeof marca === 'object'; }
+
+    // Opções de um dropdown a partir dos códigos presentes (os dicionários já estão ordenados)
+    function formatarOpcoes(categorias, codigos) {
+        const opcoes = [{label: 'Todos', value: 'todos'}];
+        Array.from(codigos).sort(function (a, b) { return a - b; }).forEach(function (codigo) {
+            const valor = categorias[codigo];
+            if (valor !== null) {
+                opcoes.push({label: valor, value: valor});
+            }
+        });
+        return opcoes;
+    }
+
+    // Código de um valor selecionado no dropdown (null para "todos", -1 quando não existe)
+    function codigoFiltro(categorias, valor, numerico) {
+        if (!valor || valor === 'todos') {
+            return null;
+        }
+        return categorias.indexOf(numerico ? Number(valor) : valor);
+    }
+
+    // funcoes.limitar_marcas_por_pais
+    function limitarMarcasPorPais(linhas, limite) {
+        if (limite <= 0) {
+            return linhas;
+        }
+        const marcasPorPais = new Map();
+        linhas.forEach(function (linha) {
+            const chave = JSON.stringify(linha[1]);
+            if (!marcasPorPais.has(chave)) {
+                marcasPorPais.set(chave, {pais: linha[1], marcas: []});
+            }
+            marcasPorPais.get(chave).marcas.push([linha[0], linha[2]]);
+        });
+
+        const linhasLimitadas = [];
+        marcasPorPais.forEach(function (grupo) {
+            let marcas = grupo.marcas;
+            if (marcas.length > limite) {
+                marcas.sort(function (a, b) { return (b[1] || 0) - (a[1] || 0) || compararValores(texto(a[0]), texto(b[0])); });
+                const restantes = marcas.slice(limite);
+                marcas = marcas.slice(0, limite);
+                marcas.push([{quantidade: restantes.length}, restantes.reduce(function (soma, linha) { return soma + (linha[1] || 0); }, 0)]);
+            }
+            marcas.forEach(function (linha) { linhasLimitadas.push([linha[0], grupo.pais, linha[1]]); });
+        });
+        return linhasLimitadas;
+    }
+
+    // funcoes.gerar_elementos_grafico
+    function gerarElementosGrafico(linhas) {
+        const elementos = [];
+        const idsVistos = new Set();
+
+        linhas.forEach(function (linha) {
+            const marca = linha[0], pais = linha[1], total = linha[2];
+            let noMarca;
+            if (ehOutrasMarcas(marca)) {
+                noMarca = idOutrasMarcas(pais);
+                elementos.push({data: {id: noMarca, label: 'Outras marcas (' + marca.quantidade + ')', tipo: 'outras_marcas'}});
+                idsVistos.add(noMarca);
+            } else {
+                noMarca = idMarca(marca);
+                if (!idsVistos.has(noMarca)) {
+                    idsVistos.add(noMarca);
+                    elementos.push({data: {id: noMarca, label: marca, tipo: 'marca'}});
+                }
+            }
+
+            if (pais !== null) {
+                const noPais = idPais(pais);
+                if (!idsVistos.has(noPais)) {
+                    idsVistos.add(noPais);
+                    elementos.push({data: {id: noPais, label: pais, tipo: 'pais'}});
+                }
+                const aresta = noPais + '->' + noMarca;
+                if (!idsVistos.has(aresta)) {
+                    idsVistos.add(aresta);
+                    elementos.push({data: {id: aresta, source: noPais, target: noMarca}});
+                }
+            }
+
+            if (total !== null) {
+                const noTotal = ehOutrasMarcas(marca) ? 'total:' + noMarca : idTotal(marca, pais);
+                if (!idsVistos.has(noTotal)) {
+                    idsVistos.add(noTotal);
+                    elementos.push({data: {id: noTotal, label: String(total), tipo: 'total_vendas'}});
+                    elementos.push({data: {id: noMarca + '->' + noTotal, source: noMarca, target: noTotal}});
+                }
+            }
+        });
+        return elementos;
+    }
+
+    // layout_grafo.calcular_posicoes e layout_grafo.posicionar
+    function posicionar(elementos, linhas, linhasReferencia, cubo) {
+        const limite = cubo.limite_marcas;
+        const espacamentoX = cubo.espacamento_x;
+        const espacamentoY = cubo.espacamento_y;
+
+        // Ordem de referência dos países e ranking das marcas de cada país (layout_grafo.ordem_referencia)
+        const referenciaPorPais = new Map();
+        linhasReferencia.forEach(function (linha) {
+            const chave = JSON.stringify(linha[1]);
+            if (!referenciaPorPais.has(chave)) {
+                referenciaPorPais.set(chave, {pais: linha[1], marcas: []});
+            }
+            referenciaPorPais.get(chave).marcas.push([linha[0], linha[2] || 0]);
+        });
+        const ranking = new Map();
+        const quantidadeMarcas = new Map();
+        referenciaPorPais.forEach(function (grupo, chave) {
+            grupo.marcas.sort(function (a, b) { return b[1] - a[1] || compararValores(a[0], b[0]); });
+            grupo.marcas.forEach(function (linha, posicao) { ranking.set(JSON.stringify([grupo.pais, linha[0]]), posicao); });
+            quantidadeMarcas.set(chave, grupo.marcas.length);
+        });
+        const paisesReferencia = Array.from(referenciaPorPais.values()).map(function (grupo) { return grupo.pais; }).sort(compararValores);
+
+        const marcasPorPais = new Map();
+        linhas.forEach(function (linha) {
+            const chave = JSON.stringify(linha[1]);
+            if (!marcasPorPais.has(chave)) {
+                marcasPorPais.set(chave, {pais: linha[1], marcas: []});
+            }
+            marcasPorPais.get(chave).marcas.push(linha[0]);
+        });
+        const paises = paisesReferencia.concat(
+            Array.from(marcasPorPais.values())
+                .map(function (grupo) { return grupo.pais; })
+                .filter(function (pais) { return !referenciaPorPais.has(JSON.stringify(pais)); })
+                .sort(compararValores)
+        );
+
+        const posicoes = new Map();
+        let inicioBloco = 0;
+        paises.forEach(function (pais) {
+            const chave = JSON.stringify(pais);
+            const grupo = marcasPorPais.get(chave);
+            const largura = limite > 0 ? limite + 1 : Math.max(quantidadeMarcas.get(chave) || 0, grupo ? grupo.marcas.length : 0, 1);
+
+            if (grupo && grupo.marcas.length) {
+                // Colunas das marcas dentro do bloco do país (layout_grafo.colunas_marcas)
+                const colunas = [];
+                const ocupadas = new Set();
+                const restantes = [];
+                grupo.marcas.forEach(function (marca) {
+                    if (ehOutrasMarcas(marca)) {
+                        colunas.push([marca, limite]);
+                        ocupadas.add(limite);
+                        return;
+                    }
+                    const posicao = ranking.get(JSON.stringify([pais, marca]));
+                    if (posicao !== undefined && (limite <= 0 || posicao < limite)) {
+                        colunas.push([marca, posicao]);
+                        ocupadas.add(posicao);
+                    } else {
+                        restantes.push(marca);
+                    }
+                });
+                restantes.sort(function (a, b) {
+                    const posicaoA = ranking.has(JSON.stringify([pais, a])) ? ranking.get(JSON.stringify([pais, a])) : ranking.size;
+                    const posicaoB = ranking.has(JSON.stringify([pais, b])) ? ranking.get(JSON.stringify([pais, b])) : ranking.size;
+                    return posicaoA - posicaoB || compararValores(a, b);
+                });
+                let proxima = 0;
+                restantes.forEach(function (marca) {
+                    while (ocupadas.has(proxima)) {
+                        proxima += 1;
+                    }
+                    colunas.push([marca, proxima]);
+                    ocupadas.add(proxima);
+                });
+
+                colunas.forEach(function (item) {
+                    const marca = item[0];
+                    const x = (inicioBloco + item[1]) * espacamentoX;
+                    let noMarca, noTotal;
+                    if (ehOutrasMarcas(marca)) {
+                        noMarca = idOutrasMarcas(pais);
+                        noTotal = 'total:' + noMarca;
+                    } else {
+                        noMarca = idMarca(marca);
+                        noTotal = idTotal(marca, pais);
+                    }
+                    if (!posicoes.has(noMarca)) {
+                        posicoes.set(noMarca, {x: x, y: espacamentoY});
+                    }
+                    posicoes.set(noTotal, {x: x, y: 2 * espacamentoY});
+                });
+
+                if (pais !== null) {
+                    posicoes.set(idPais(pais), {x: (inicioBloco + (largura - 1) / 2) * espacamentoX, y: 0});
+                }
+            }
+            inicioBloco += largura;
+        });
+
+        elementos.forEach(function (elemento) {
+            const posicao = posicoes.get(elemento.data.id);
+            if (posicao !== undefined && elemento.data.source === undefined) {
+                elemento.position = posicao;
+            }
+        });
+        return elementos;
+    }
+
+    // Callback único do painel no navegador, com as mesmas saídas de main_app.atualizar_painel_vendas
+    function atualizar(filtro, cubo) {
+        const anoSelecionado = (filtro && filtro.ano) || 'todos';
+        const paisSelecionado = (filtro && filtro.pais) || 'todos';
+        const codigoAno = codigoFiltro(cubo.anos, anoSelecionado, true);
+        const codigoPais = codigoFiltro(cubo.paises, paisSelecionado, false);
+        const quantidadePaises = cubo.paises.length;
+
+        const somaMarcaPais = new Map();
+        const somaReferencia = new Map();
+        const somaMarca = new Map();
+        const paisesDoAno = new Set();
+        const anosDoPais = new Set();
+        let totalGeral = null;
+
+        for (let i = 0; i < cubo.total.length; i++) {
+            const marca = cubo.marca[i], pais = cubo.pais[i], ano = cubo.ano[i], total = cubo.total[i];
+            const chave = marca * quantidadePaises + pais;
+            somaReferencia.set(chave, (somaReferencia.get(chave) || 0) + total);
+
+            const anoConfere = codigoAno === null || ano === codigoAno;
+            const paisConfere = codigoPais === null || pais === codigoPais;
+            if (anoConfere) {
+                paisesDoAno.add(pais);
+            }
+            if (paisConfere) {
+                anosDoPais.add(ano);
+            }
+            if (anoConfere && paisConfere) {
+                somaMarcaPais.set(chave, (somaMarcaPais.get(chave) || 0) + total);
+                somaMarca.set(marca, (somaMarca.get(marca) || 0) + total);
+                totalGeral = (totalGeral || 0) + total;
+            }
+        }
+
+        // Linhas (marca, país sede, total) na ordem do resumo: total decrescente e marca
+        function linhasMarcaPais(somas) {
+            const linhas = [];
+            somas.forEach(function (total, chave) {
+                if (total) {
+                    linhas.push([cubo.marcas[Math.floor(chave / quantidadePaises)], cubo.paises[chave % quantidadePaises], total]);
+                }
+            });
+            return linhas.sort(function (a, b) { return b[2] - a[2] || compararValores(a[0], b[0]); });
+        }
+
+        const linhas = limitarMarcasPorPais(linhasMarcaPais(somaMarcaPais), cubo.limite_marcas);
+        const elementos = posicionar(gerarElementosGrafico(linhas), linhas, linhasMarcaPais(somaReferencia), cubo);
+
+        const tabela = [];
+        somaMarca.forEach(function (total, codigo) {
+            if (total) {
+                tabela.push({marca: cubo.marcas[codigo], total_vendas: total});
+            }
+        });
+        tabela.sort(function (a, b) { return b.total_vendas - a.total_vendas || compararValores(a.marca, b.marca); });
+
+        const opcoesPaises = formatarOpcoes(cubo.paises, paisesDoAno);
+        const opcoesAnos = formatarOpcoes(cubo.anos, anosDoPais);
+
+        return [
+            elementos,
+            String(anoSelecionado),
+            tabela,
+            totalGeral !== null ? ' ' + totalGeral : '',
+            opcoesPaises,
+            opcoesAnos,
+            opcoesPaises.length - 1,
+            opcoesAnos.length - 1
+        ];
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        painel: {atualizar: atualizar}
+    });
+})();
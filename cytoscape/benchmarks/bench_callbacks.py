@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# bench_callbacks.py
+
+# Benchmark dos callbacks do dashboard para tabelas de vendas de tamanhos crescentes.
+# Para cada escala, gera dados sintéticos (dados_sinteticos.gerar_dados), atualiza os agregados e mede,
+# para cada combinação de filtros:
+#   - cada etapa do painel chamada diretamente (gráfico de rede, tabela de vendas, total geral e opções
+#     dos dropdowns), com o cache de resultados limpo antes de cada chamada;
+#   - o callback completo do painel chamado pelo endpoint HTTP do Dash (_dash-update-component),
+#     pelo cliente de teste do Flask ou, com DASH_BENCH_URL, por um servidor em execução.
+# Relata as latências p50/p95/p99, as linhas lidas no banco (pg_stat_user_tables) e o pico de memória
+# alocada em Python (tracemalloc) por chamada.
+#
+# Uso: python benchmarks/bench_callbacks.py [quantidades de vendas...]
+#   DASH_BENCH_REPETICOES  chamadas medidas por callback e filtro (padrão 30)
+#   DASH_BENCH_URL         URL de um servidor do dashboard para as medições HTTP (padrão: cliente de teste);
+#                          o cache de resultados desse servidor não é limpo entre as chamadas
+# ATENÇÃO: recria os dados das tabelas carros e vendas; use apenas em um banco de benchmark.
+
+# Importar as bibliotecas necessárias
+import os
+import sys
+import json
+import time
+import statistics
+import tracemalloc
+import urllib.request
+
+diretorio_app = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, diretorio_app)
+
+from sqlalchemy import text
+import cache
+import fontes
+import agregados
+import main_app
+from db import Session, obter_engine
+from dados_sinteticos import gerar_dados
+
+repeticoes = int(os.environ.get("DASH_BENCH_REPETICOES", "30"))
+url_servidor = os.environ.get("DASH_BENCH_URL")
+
+# Tabelas cujas leituras são contadas como linhas lidas
+tabelas_lidas = ('vendas', 'carros', 'vendas_agregadas')
+
+# Tempo para o PostgreSQL publicar as estatísticas de leitura das outras conexões
+espera_estatisticas = 1.0
+
+# Callback do painel registrado no servidor, usado nas chamadas HTTP
+chave_painel = next(chave for chave in main_app.dash_app.app.callback_map if 'graph-rede.elements' in chave)
+
+# Etapas do painel chamadas diretamente para o filtro (ano, país sede)
+def etapas_painel(ano_selecionado, pais_selecionado):
+    return {
+        'grafo': lambda: main_app.atualizar_elementos_graficos(ano_selecionado, pais_selecionado),
+        'tabela': lambda: main_app.atualizar_tabela_vendas(ano_selecionado, pais_selecionado, 0, []),
+        'total': lambda: main_app.atualizar_total_geral(fontes.resumo_vendas(ano_selecionado, pais_selecionado)[2]),
+        'opcoes_paises': lambda: fontes.opcoes_paises(ano_selecionado),
+        'opcoes_anos': lambda: fontes.opcoes_anos(pais_selecionado),
+    }
+
+# Corpo da requisição do Dash para o callback do painel com o filtro (ano, país sede)
+def requisicao_painel(ano_selecionado, pais_selecionado):
+    callback = main_app.dash_app.app.callback_map[chave_painel]
+    valores = {
+        'filtro-estado.data': {'ano': ano_selecionado, 'pais': pais_selecionado},
+        'tabela-vendas.page_current': 0,
+        'tabela-vendas.sort_by': [],
+        'grafo-estado.data': None,
+    }
+    return {
+        'output': chave_painel,
+        'outputs': [{'id': saida.component_id, 'property': saida.component_property} for saida in callback['output']],
+        'inputs': [dict(item, value=valores[f"{item['id']}.{item['property']}"]) for item in callback['inputs']],
+        'state': [dict(item, value=valores[f"{item['id']}.{item['property']}"]) for item in callback['state']],
+        'changedPropIds': ['filtro-estado.data'],
+    }
+
+# Chamada do callback do painel pelo endpoint HTTP do Dash
+def chamada_http(ano_selecionado, pais_selecionado, cliente):
+    corpo = json.dumps(requisicao_painel(ano_selecionado, pais_selecionado)).encode()
+    if url_servidor:
+        requisicao = urllib.request.Request(
+            url_servidor.rstrip('/') + '/_dash-update-component',
+            data=corpo, headers={'Content-Type': 'application/json'}
+        )
+        def chamar():
+            with urllib.request.urlopen(requisicao) as resposta:
+                return resposta.read()
+    else:
+        def chamar():
+            resposta = cliente.post('/_dash-update-component', data=corpo, content_type='application/json')
+            if resposta.status_code != 200:
+                raise RuntimeError(f'Resposta {resposta.status_code} do callback do painel')
+            return resposta.data
+    return chamar
+
+# Total de linhas lidas (sequencialmente e por índice) nas tabelas do dashboard
+def linhas_lidas():
+    with obter_engine().connect() as conexao:
+        conexao.execute(text('SELECT pg_stat_clear_snapshot()'))
+        return conexao.execute(text(
+            'SELECT COALESCE(SUM(COALESCE(seq_tup_read, 0) + COALESCE(idx_tup_fetch, 0)), 0) '
+            'FROM pg_stat_user_tables WHERE relname = ANY(:tabelas)'
+        ), {'tabelas': list(tabelas_lidas)}).scalar()
+
+# Executa uma chamada com o cache de resultados limpo e devolve a sessão ao pool, como ao fim de uma requisição
+def executar(chamar):
+    cache.cache_resultados.limpar()
+    try:
+        return chamar()
+    finally:
+        Session.remove()
+
+# Mede as latências, as linhas lidas e o pico de memória de uma chamada
+def medir(chamar):
+    executar(chamar)  # Aquecimento
+
+    latencias = []
+    lidas_antes = linhas_lidas()
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        executar(chamar)
+        latencias.append(time.perf_counter() - inicio)
+    time.sleep(espera_estatisticas)
+    lidas = (linhas_lidas() - lidas_antes) / repeticoes
+
+    tracemalloc.start()
+    executar(chamar)
+    _, pico_memoria = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    percentis = statistics.quantiles(latencias, n=100, method='inclusive') if len(latencias) > 1 else latencias * 99
+    return {
+        'p50': percentis[49] * 1000,
+        'p95': percentis[94] * 1000,
+        'p99': percentis[98] * 1000,
+        'linhas_lidas': lidas,
+        'memoria_kib': pico_memoria / 1024,
+    }
+
+# Combinações de filtros medidas: sem filtro, por ano, por país sede e por ano e país sede
+def filtros_medidos():
+    anos = [opcao['value'] for opcao in fontes.opcoes_anos('todos')[1:]]
+    paises = [opcao['value'] for opcao in fontes.opcoes_paises('todos')[1:]]
+    Session.remove()
+    ano = anos[len(anos) // 2] if anos else 'todos'
+    pais = paises[0] if paises else 'todos'
+    return [('todos', 'todos'), (ano, 'todos'), ('todos', pais), (ano, pais)]
+
+if __name__ == '__main__':
+    escalas = [int(valor) for valor in sys.argv[1:]] or [10_000, 100_000, 1_000_000, 10_000_000, 50_000_000]
+    cliente = main_app.dash_app.app.server.test_client()
+
+    print(f"{'vendas':>12} {'callback':>14} {'ano':>6} {'país':>12} {'p50 (ms)':>10} {'p95 (ms)':>10} "
+          f"{'p99 (ms)':>10} {'linhas lidas':>14} {'memória (KiB)':>14}")
+    for quantidade_vendas in escalas:
+        gerar_dados(quantidade_vendas)
+        agregados.atualizar_agregado()
+        cache.cache_resultados.limpar()
+
+        for ano_selecionado, pais_selecionado in filtros_medidos():
+            chamadas = dict(etapas_painel(ano_selecionado, pais_selecionado))
+            chamadas['painel_http'] = chamada_http(ano_selecionado, pais_selecionado, cliente)
+
+            for nome, chamar in chamadas.items():
+                resultado = medir(chamar)
+                print(f"{quantidade_vendas:>12} {nome:>14} {str(ano_selecionado):>6} {str(pais_selecionado):>12} "
+                      f"{resultado['p50']:>10.2f} {resultado['p95']:>10.2f} {resultado['p99']:>10.2f} "
+                      f"{resultado['linhas_lidas']:>14.0f} {resultado['memoria_kib']:>14.0f}")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# bench_inicializacao.py
+
+# Mede o tempo de inicialização do dashboard (importação de main_app e primeira montagem do layout)
+# para tabelas de vendas de tamanhos crescentes. O tempo deve se manter estável à medida que vendas cresce.
+#
+# Uso: python benchmarks/bench_inicializacao.py [quantidades de vendas...]
+# ATENÇÃO: recria os dados das tabelas carros e vendas; use apenas em um banco de benchmark.
+
+# Importar as bibliotecas necessárias
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+diretorio_app = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, diretorio_app)
+
+import agregados
+from dados_sinteticos import gerar_dados
+
+# Código executado em um processo novo para cada medição
+codigo_inicializacao = """
+import json, time
+inicio = time.perf_counter()
+import main_app
+importado = time.perf_counter()
+with main_app.dash_app.app.server.test_request_context('/'):
+    main_app.dash_app.criar_layout()
+fim = time.perf_counter()
+print(json.dumps({'importacao': importado - inicio, 'layout': fim - importado}))
+"""
+
+# Executa a inicialização em um processo Python novo e retorna os tempos medidos
+def medir_inicializacao():
+    ambiente = dict(os.environ, DASH_CACHE_BACKEND='memoria')
+    saida = subprocess.run(
+        [sys.executable, '-c', codigo_inicializacao],
+        cwd=diretorio_app, env=ambiente, capture_output=True, text=True, check=True
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+if __name__ == '__main__':
+    escalas = [int(valor) for valor in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    repeticoes = 5
+
+    print(f"{'vendas':>12} {'importação (s)':>16} {'layout (s)':>12} {'total (s)':>12}")
+    for quantidade_vendas in escalas:
+        gerar_dados(quantidade_vendas)
+        agregados.atualizar_agregado()
+
+        medicoes = [medir_inicializacao() for _ in range(repeticoes)]
+        importacao = statistics.median(medicao['importacao'] for medicao in medicoes)
+        layout = statistics.median(medicao['layout'] for medicao in medicoes)
+        print(f"{quantidade_vendas:>12} {importacao:>16.3f} {layout:>12.3f} {importacao + layout:>12.3f}")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# bench_serializacao.py
+
+# Micro-benchmark do trabalho de cada callback do painel depois da consulta, sem banco de dados:
+# montagem dos registros da tabela (DataFrame.to_dict versus registros gerados direto das linhas)
+# e serialização da resposta, para quantidades crescentes de marcas. A serialização é medida com o
+# codificador padrão do plotly ('auto', o usado pelo Dash, que escolhe o orjson quando instalado)
+# e com o json padrão, para referência.
+#
+# Uso: python benchmarks/bench_serializacao.py [quantidades de marcas...]
+
+# Importar as bibliotecas necessárias
+import os
+import sys
+import timeit
+import random
+import importlib.util
+
+diretorio_app = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, diretorio_app)
+
+import plotly.io as pio
+import funcoes
+import layout_grafo
+
+# Linhas sintéticas (marca, pais_sede, total_vendas), com cada marca vendida em um país sede
+def gerar_linhas(quantidade_marcas, quantidade_paises=10):
+    gerador = random.Random(quantidade_marcas)
+    return [
+        (f'Marca {indice:06d}', f'País {indice % quantidade_paises:02d}', gerador.randint(1, 100_000))
+        for indice in range(quantidade_marcas)
+    ]
+
+# Tempo médio, em milissegundos, de uma execução da função
+def medir(funcao, repeticoes):
+    return min(timeit.repeat(funcao, number=repeticoes, repeat=3)) / repeticoes * 1000
+
+# Registros da tabela como eram montados antes, com pandas (importado apenas aqui, para comparação)
+def registros_pandas(linhas):
+    import pandas as pd
+    return pd.DataFrame(linhas, columns=['marca', 'total_vendas']).to_dict('records')
+
+# Serialização da resposta de um callback com o codificador informado
+def serializar(resposta, engine):
+    pio.json.config.default_engine = engine
+    return pio.json.to_json_plotly(resposta)
+
+if __name__ == '__main__':
+    escalas = [int(valor) for valor in sys.argv[1:]] or [100, 1_000, 10_000, 50_000]
+    repeticoes = 20
+    engines = ['auto', 'json']
+
+    print(f"Codificador escolhido por 'auto': {'orjson' if importlib.util.find_spec('orjson') is not None else 'json'}")
+    print(f"{'marcas':>8} {'tabela pandas':>14} {'tabela direta':>14}"
+          + ''.join(f" {'resposta ' + engine:>16}" for engine in engines) + "   (ms por chamada)")
+    for quantidade_marcas in escalas:
+        linhas = gerar_linhas(quantidade_marcas)
+        vendas_marca = [(marca, total_vendas) for marca, _, total_vendas in linhas]
+
+        linhas_grafo = funcoes.limitar_grafo(linhas)
+        elementos = layout_grafo.posicionar(
+            funcoes.gerar_elementos_grafico(linhas_grafo),
+            layout_grafo.calcular_posicoes(linhas_grafo, linhas)
+        )
+        resposta = {'response': {
+            'graph-rede': {'elements': elementos},
+            'tabela-vendas': {'data': funcoes.gerar_registros_tabela(vendas_marca)},
+        }}
+
+        registros_pandas(vendas_marca[:1])  # Importa o pandas fora da medição
+        tempos = [
+            medir(lambda: registros_pandas(vendas_marca), repeticoes),
+            medir(lambda: funcoes.gerar_registros_tabela(vendas_marca), repeticoes),
+        ] + [medir(lambda: serializar(resposta, engine), repeticoes) for engine in engines]
+
+        print(f"{quantidade_marcas:>8} {tempos[0]:>14.3f} {tempos[1]:>14.3f}"
+              + ''.join(f" {tempo:>16.3f}" for tempo in tempos[2:]))
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# dados_sinteticos.py
+
+# Importar as bibliotecas necessárias
+import os
+import sys
+from sqlalchemy import Table, Column, INTEGER, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import Base, obter_engine
+
+# Tabela de clientes mínima, referenciada pela chave estrangeira vendas.id_cliente
+Table('clientes', Base.metadata, Column('id_cliente', INTEGER, primary_key=True), extend_existing=True)
+
+# Gera dados sintéticos nas tabelas carros e vendas do banco configurado em .env.
+# ATENÇÃO: apaga os dados existentes dessas tabelas; use apenas em um banco de benchmark.
+def gerar_dados(quantidade_vendas, quantidade_carros=1000, quantidade_marcas=50, quantidade_paises=10,
+                ano_inicial=2010, quantidade_anos=14):
+    Base.metadata.create_all(obter_engine())
+    parametros = {
+        'vendas': quantidade_vendas,
+        'carros': quantidade_carros,
+        'marcas': quantidade_marcas,
+        'paises': quantidade_paises,
+        'ano_inicial': ano_inicial,
+        'dias': quantidade_anos * 365,
+    }
+    with obter_engine().begin() as conexao:
+        conexao.execute(text("TRUNCATE vendas, carros RESTART IDENTITY CASCADE"))
+        conexao.execute(text("""
+            INSERT INTO carros (id_carro, marca, modelo, ano_fabricacao, cor, valor_unitario, data_entrada, pais_sede)
+            SELECT i,
+                   'Marca ' || (i % :marcas),
+                   'Modelo ' || i,
+                   :ano_inicial + (i % 10),
+                   'Cor ' || (i % 7),
+                   20000 + (i % 80) * 1000,
+                   make_date(:ano_inicial, 1, 1),
+                   'País ' || ((i % :marcas) % :paises)
+            FROM generate_series(1, :carros) AS i
+        """), parametros)
+        conexao.execute(text("""
+            INSERT INTO vendas (id_venda, id_carro, data_venda, valor_venda)
+            SELECT i,
+                   1 + (hashint4(i) & 2147483647) % :carros,
+                   make_date(:ano_inicial, 1, 1) + (hashint4(i + 1) & 2147483647) % :dias,
+                   10000 + (hashint4(i + 2) & 2147483647) % 90000
+            FROM generate_series(1, :vendas) AS i
+        """), parametros)
+    with obter_engine().connect().execution_options(isolation_level='AUTOCOMMIT') as conexao:
+        conexao.execute(text("VACUUM ANALYZE vendas"))
+        conexao.execute(text("VACUUM ANALYZE carros"))
+
+# python benchmarks/dados_sinteticos.py <quantidade de vendas>
+if __name__ == '__main__':
+    import agregados
+    gerar_dados(int(sys.argv[1]))
+    agregados.atualizar_agregado()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# cache.py
+
+# Importar as bibliotecas necessárias
+import os
+import time
+import json
+import sqlite3
+import hashlib
+import threading
+import functools
+from collections import OrderedDict
+from funcoes import OutrasMarcas
+
+# Configuração do cache de resultados.
+# DASH_CACHE_BACKEND=memoria mantém o cache em cada processo; DASH_CACHE_BACKEND=sqlite
+# compartilha os resultados entre todos os processos do servidor por meio de um arquivo local.
+cache_backend = os.environ.get("DASH_CACHE_BACKEND", "memoria")
+# O arquivo padrão fica no diretório do aplicativo, e não no diretório temporário compartilhado por todos os usuários
+cache_caminho = os.environ.get(
+    "DASH_CACHE_CAMINHO",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados", "cache_resultados.sqlite3")
+)
+cache_tamanho = int(os.environ.get("DASH_CACHE_TAMANHO", "256"))
+cache_ttl = float(os.environ.get("DASH_CACHE_TTL", "300"))
+cache_intervalo_marca_dagua = float(os.environ.get("DASH_CACHE_INTERVALO_MARCA_DAGUA", "5"))
+# Intervalo mínimo, em segundos, entre duas atualizações do último acesso de uma entrada no backend SQLite
+cache_intervalo_acesso = float(os.environ.get("DASH_CACHE_INTERVALO_ACESSO", "5"))
+
+# Armazenamento LRU em memória, local ao processo
+class BackendMemoria:
+
+    def __init__(self, tamanho_maximo):
+        self.tamanho_maximo = tamanho_maximo
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def ler(self, chave):
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is not None:
+                self._itens.move_to_end(chave)
+            return item
+
+    def gravar(self, chave, item):
+        with self._trava:
+            self._itens[chave] = item
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+    def remover(self, chave):
+        with self._trava:
+            self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+# Codifica um valor do cache em JSON. Os resultados são listas, tuplas, dicionários e valores simples;
+# tuplas e OutrasMarcas são marcadas para voltarem com o mesmo tipo. JSON, e não pickle, para que
+# o conteúdo do arquivo nunca seja executado ao ser lido.
+def codificar(valor):
+    if isinstance(valor, OutrasMarcas):
+        return {'__outras_marcas__': valor.quantidade}
+    if isinstance(valor, tuple):
+        return {'__tupla__': [codificar(item) for item in valor]}
+    if isinstance(valor, list):
+        return [codificar(item) for item in valor]
+    if isinstance(valor, dict):
+        return {chave: codificar(item) for chave, item in valor.items()}
+    return valor
+
+def decodificar_objeto(objeto):
+    if len(objeto) == 1 and '__tupla__' in objeto:
+        return tuple(objeto['__tupla__'])
+    if len(objeto) == 1 and '__outras_marcas__' in objeto:
+        return OutrasMarcas(objeto['__outras_marcas__'])
+    return objeto
+
+def serializar(valor):
+    return json.dumps(codificar(valor), separators=(',', ':'))
+
+def desserializar(texto):
+    return json.loads(texto, object_hook=decodificar_objeto)
+
+# Armazenamento LRU em um arquivo SQLite local, compartilhado entre os processos do mesmo host.
+# O resultado calculado por um worker passa a atender a mesma combinação de filtros em todos os outros.
+# Erros do SQLite (arquivo bloqueado por outro processo, disco cheio) não interrompem o callback:
+# a leitura vira uma falha do cache e a gravação é descartada.
+class BackendSQLite:
+
+    def __init__(self, caminho, tamanho_maximo, intervalo_acesso=cache_intervalo_acesso):
+        self.caminho = caminho
+        self.tamanho_maximo = tamanho_maximo
+        self.intervalo_acesso = intervalo_acesso
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        with self._conexao() as conexao:
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS resultados ("
+                " chave TEXT PRIMARY KEY,"
+                " item TEXT NOT NULL,"
+                " acessado_em REAL NOT NULL)"
+            )
+            conexao.execute("CREATE INDEX IF NOT EXISTS ix_resultados_acessado_em ON resultados (acessado_em)")
+
+    # Uma conexão por thread; o modo WAL permite leituras simultâneas de vários processos
+    def _conexao(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexao = conexao
+        return conexao
+
+    # Chaves são tuplas de valores simples; o repr é estável entre processos
+    @staticmethod
+    def _chave(chave):
+        return hashlib.sha256(repr(chave).encode('utf-8')).hexdigest()
+
+    # O último acesso, usado na remoção LRU, é atualizado no máximo uma vez a cada intervalo_acesso segundos,
+    # para que a maioria das leituras não precise da trava de escrita compartilhada pelos processos
+    def ler(self, chave):
+        chave = self._chave(chave)
+        try:
+            conexao = self._conexao()
+            linha = conexao.execute("SELECT item, acessado_em FROM resultados WHERE chave = ?", (chave,)).fetchone()
+            if linha is None:
+                return None
+            texto, acessado_em = linha
+            try:
+                item = desserializar(texto)
+            except (TypeError, ValueError):
+                # Entrada ilegível (por exemplo, gravada em outro formato): descartada e recalculada
+                conexao.execute("DELETE FROM resultados WHERE chave = ?", (chave,))
+                return None
+            agora = time.time()
+            if agora - acessado_em >= self.intervalo_acesso:
+                conexao.execute("UPDATE resultados SET acessado_em = ? WHERE chave = ?", (agora, chave))
+        except sqlite3.Error:
+            return None
+        return item
+
+    def gravar(self, chave, item):
+        try:
+            conexao = self._conexao()
+            conexao.execute(
+                "INSERT OR REPLACE INTO resultados (chave, item, acessado_em) VALUES (?, ?, ?)",
+                (self._chave(chave), serializar(item), time.time())
+            )
+            conexao.execute(
+                "DELETE FROM resultados WHERE chave IN ("
+                " SELECT chave FROM resultados ORDER BY acessado_em"
+                " LIMIT max((SELECT COUNT(*) FROM resultados) - ?, 0))",
+                (self.tamanho_maximo,)
+            )
+        except sqlite3.Error:
+            pass
+
+    def remover(self, chave):
+        try:
+            self._conexao().execute("DELETE FROM resultados WHERE chave = ?", (self._chave(chave),))
+        except sqlite3.Error:
+            pass
+
+    # As entradas não removidas continuam com a marca d'água anterior e são descartadas na leitura
+    def limpar(self):
+        try:
+            self._conexao().execute("DELETE FROM resultados")
+        except sqlite3.Error:
+            pass
+
+    def __len__(self):
+        try:
+            return self._conexao().execute("SELECT COUNT(*) FROM resultados").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+# Cria o armazenamento configurado em DASH_CACHE_BACKEND
+def criar_backend(nome, tamanho_maximo, caminho=None):
+    if nome == 'sqlite':
+        return BackendSQLite(caminho or cache_caminho, tamanho_maximo)
+    if nome == 'memoria':
+        return BackendMemoria(tamanho_maximo)
+    raise ValueError(f"Backend de cache desconhecido: {nome}")
+
+# Cache LRU com tempo de expiração para os resultados das consultas do dashboard.
+# Cada entrada guarda a marca d'água dos dados do momento em que foi calculada; quando a
+# marca d'água muda (novas vendas chegaram), as entradas antigas deixam de ser usadas.
+class CacheResultados:
+
+    def __init__(self, tamanho_maximo=256, ttl=300, marca_dagua=None, intervalo_marca_dagua=5, backend=None):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self.marca_dagua = marca_dagua
+        self.intervalo_marca_dagua = intervalo_marca_dagua
+        self.backend = backend if backend is not None else BackendMemoria(tamanho_maximo)
+
+        self._trava = threading.Lock()
+        self._marca_atual = None
+        self._marca_verificada_em = None
+
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+
+    # Marca d'água atual dos dados, consultada no máximo uma vez a cada intervalo_marca_dagua segundos
+    def marca_dagua_atual(self):
+        if self.marca_dagua is None:
+            return None
+        agora = time.monotonic()
+        if self._marca_verificada_em is None or agora - self._marca_verificada_em >= self.intervalo_marca_dagua:
+            marca = self.marca_dagua()
+            with self._trava:
+                mudou = self._marca_verificada_em is not None and marca != self._marca_atual
+                if mudou:
+                    self.invalidacoes += 1
+                self._marca_atual = marca
+                self._marca_verificada_em = agora
+            if mudou:
+                self.backend.limpar()
+        return self._marca_atual
+
+    # Retorna o valor em cache para a chave ou o calcula, armazena e retorna.
+    # A expiração usa o relógio de parede, comum a todos os processos que compartilham o backend.
+    def obter(self, chave, calcular):
+        marca = self.marca_dagua_atual()
+        agora = time.time()
+
+        item = self.backend.ler(chave)
+        if item is not None:
+            expira_em, marca_item, valor = item
+            if expira_em > agora and marca_item == marca:
+                with self._trava:
+                    self.acertos += 1
+                return valor
+            self.backend.remover(chave)
+
+        with self._trava:
+            self.falhas += 1
+
+        valor = calcular()
+        self.backend.gravar(chave, (agora + self.ttl, marca, valor))
+        return valor
+
+    def limpar(self):
+        self.backend.limpar()
+
+    # Contadores de acertos e falhas deste processo, expostos em /estatisticas-cache
+    def estatisticas(self):
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            estatisticas = {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+                'invalidacoes': self.invalidacoes,
+            }
+        estatisticas.update({
+            'backend': type(self.backend).__name__,
+            'itens': len(self.backend),
+            'tamanho_maximo': self.tamanho_maximo,
+            'ttl': self.ttl,
+        })
+        return estatisticas
+
+# Cache compartilhado pelas consultas do dashboard.
+# A marca d'água é a da fonte de dados selecionada, definida em fontes.py.
+cache_resultados = CacheResultados(
+    cache_tamanho,
+    cache_ttl,
+    intervalo_marca_dagua=cache_intervalo_marca_dagua,
+    backend=criar_backend(cache_backend, cache_tamanho)
+)
+
+# Decorador que guarda em cache o resultado da função, usando os argumentos como chave.
+# Para argumentos não comparáveis por valor (por exemplo, consultas SQLAlchemy), informe uma função chave.
+def em_cache(funcao=None, chave=None, cache=None):
+    if funcao is None:
+        return functools.partial(em_cache, chave=chave, cache=cache)
+
+    @functools.wraps(funcao)
+    def funcao_em_cache(*args, **kwargs):
+        argumentos = chave(*args, **kwargs) if chave is not None else (args, tuple(sorted(kwargs.items())))
+        return (cache or cache_resultados).obter((funcao.__module__, funcao.__qualname__, argumentos),
+                                                 lambda: funcao(*args, **kwargs))
+
+    return funcao_em_cache
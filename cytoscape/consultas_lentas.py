@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# consultas_lentas.py
+
+# Log das consultas lentas do dashboard: toda instrução que leva mais de DB_CONSULTA_LENTA_SEGUNDOS é gravada
+# em um arquivo local com rotação, com os parâmetros usados e o plano de execução medido pelo banco
+# (EXPLAIN (ANALYZE, BUFFERS) no PostgreSQL, EXPLAIN ANALYZE no DuckDB). O plano é capturado fora da requisição,
+# por uma thread que repete a consulta em outra conexão do pool. Um plano rápido para uma consulta que foi lenta
+# indica espera (bloqueios, pool ou servidor ocupado), e não um plano ruim.
+# As consultas transmitidas (db.transmitir) são medidas da execução até o fechamento do cursor, em db.transmitir.
+
+# Importar as bibliotecas necessárias
+import os
+import time
+import queue
+import logging
+import threading
+import logging.handlers
+from sqlalchemy import event
+
+# Configuração do log de consultas lentas (DB_CONSULTA_LENTA_SEGUNDOS=0 desativa o log)
+consulta_lenta_segundos = float(os.environ.get("DB_CONSULTA_LENTA_SEGUNDOS", "1.0"))
+consulta_lenta_arquivo = os.environ.get("DB_CONSULTA_LENTA_ARQUIVO", "logs/consultas_lentas.log")
+consulta_lenta_tamanho_arquivo = int(os.environ.get("DB_CONSULTA_LENTA_TAMANHO_ARQUIVO", str(10 * 1024 * 1024)))
+consulta_lenta_arquivos = int(os.environ.get("DB_CONSULTA_LENTA_ARQUIVOS", "5"))
+consulta_lenta_explain = os.environ.get("DB_CONSULTA_LENTA_EXPLAIN", "1") == "1"
+# Intervalo mínimo, em segundos, entre dois planos capturados para a mesma instrução
+consulta_lenta_intervalo_explain = float(os.environ.get("DB_CONSULTA_LENTA_INTERVALO_EXPLAIN", "300"))
+
+# Prefixo do EXPLAIN por dialeto; consultas em outros bancos são registradas sem plano
+prefixos_explain = {
+    'postgresql': 'EXPLAIN (ANALYZE, BUFFERS) ',
+    'duckdb': 'EXPLAIN ANALYZE ',
+}
+
+# Logger com rotação do arquivo, criado no primeiro registro
+_logger = None
+_trava_logger = threading.Lock()
+
+def obter_logger():
+    global _logger
+    if _logger is None:
+        with _trava_logger:
+            if _logger is None:
+                os.makedirs(os.path.dirname(os.path.abspath(consulta_lenta_arquivo)), exist_ok=True)
+                manipulador = logging.handlers.RotatingFileHandler(
+                    consulta_lenta_arquivo,
+                    maxBytes=consulta_lenta_tamanho_arquivo,
+                    backupCount=consulta_lenta_arquivos,
+                    encoding='utf-8'
+                )
+                manipulador.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+                logger = logging.getLogger('consultas_lentas')
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                logger.addHandler(manipulador)
+                _logger = logger
+    return _logger
+
+# Consultas lentas aguardando o plano de execução, processadas por uma única thread
+_fila = queue.Queue(maxsize=100)
+_thread = None
+_explicadas_em = {}
+
+def registrar(duracao, instrucao, parametros, plano=None):
+    linhas = [f'{duracao * 1000:.1f} ms', instrucao.strip(), f'parâmetros: {parametros!r}']
+    if plano is not None:
+        linhas.append('plano:')
+        linhas.extend(f'  {linha}' for linha in plano)
+    obter_logger().info('\n'.join(linhas) + '\n')
+
+# Plano de execução da instrução, medido em uma conexão própria, sem afetar a requisição que a executou
+def capturar_plano(engine, instrucao, parametros):
+    prefixo = prefixos_explain.get(engine.dialect.name)
+    if prefixo is None:
+        return None
+    with engine.connect() as conexao:
+        resultado = conexao.exec_driver_sql(
+            prefixo + instrucao, parametros,
+            execution_options={'consulta_lenta_explain': True}
+        )
+        # O texto do plano está na última coluna (uma linha por registro no PostgreSQL, um bloco no DuckDB)
+        linhas = [texto for linha in resultado for texto in str(linha[-1]).splitlines()]
+        conexao.rollback()
+    return linhas
+
+def processar_fila():
+    while True:
+        engine, duracao, instrucao, parametros = _fila.get()
+        agora = time.monotonic()
+        explicada_em = _explicadas_em.get(instrucao)
+        plano = None
+        if explicada_em is None or agora - explicada_em >= consulta_lenta_intervalo_explain:
+            _explicadas_em[instrucao] = agora
+            try:
+                plano = capturar_plano(engine, instrucao, parametros)
+            except Exception as erro:
+                plano = [f'falha ao capturar o plano: {erro!r}']
+        registrar(duracao, instrucao, parametros, plano)
+
+# Envia a consulta para a captura do plano; somente consultas de leitura são repetidas com ANALYZE
+def enviar(engine, duracao, instrucao, parametros):
+    global _thread
+    if not consulta_lenta_explain or not instrucao.lstrip().upper().startswith(('SELECT', 'WITH')):
+        registrar(duracao, instrucao, parametros)
+        return
+    with _trava_logger:
+        if _thread is None:
+            _thread = threading.Thread(target=processar_fila, name='consultas-lentas', daemon=True)
+            _thread.start()
+    try:
+        _fila.put_nowait((engine, duracao, instrucao, parametros))
+    except queue.Full:
+        registrar(duracao, instrucao, parametros, ['plano não capturado: fila de consultas lentas cheia'])
+
+# Mede o tempo de cada instrução executada pela engine e envia as lentas para o log
+def instrumentar_engine(engine):
+    if consulta_lenta_segundos <= 0:
+        return
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def iniciar_consulta(conexao, cursor, instrucao, parametros, contexto, executemany):
+        conexao.info.setdefault('inicio_consultas', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def medir_consulta(conexao, cursor, instrucao, parametros, contexto, executemany):
+        duracao = time.perf_counter() - conexao.info['inicio_consultas'].pop()
+        opcoes = contexto.execution_options
+        if (duracao < consulta_lenta_segundos or executemany
+                or opcoes.get('consulta_lenta_explain') or opcoes.get('stream_results')):
+            return
+        enviar(conexao.engine, duracao, instrucao, parametros)
+
+    # Descarta o início de uma instrução que terminou com erro
+    @event.listens_for(engine, 'handle_error')
+    def descartar_consulta(contexto_excecao):
+        inicios = contexto_excecao.connection.info.get('inicio_consultas') if contexto_excecao.connection is not None else None
+        if inicios:
+            inicios.pop()
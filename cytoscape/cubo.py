@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# cubo.py
+
+# Importar as bibliotecas necessárias
+import threading
+import numpy as np
+import cache
+import disponibilidade
+from sqlalchemy import select
+from db import transmitir
+from agregados import VendasAgregadas, marca_dagua as marca_dagua_agregados
+
+# Função para codificar uma lista de valores como dicionário ordenado + códigos inteiros
+def codificar(valores):
+    categorias = sorted(set(valores), key=lambda valor: (valor is None, valor))
+    indice = {valor: codigo for codigo, valor in enumerate(categorias)}
+    codigos = np.fromiter((indice[valor] for valor in valores), dtype=np.int32, count=len(valores))
+    return categorias, indice, codigos
+
+# Ordena em memória as linhas (marca, total_vendas) da tabela de vendas (fontes.vendas_marca_ordenadas):
+# pela coluna escolhida e, em seguida, pela marca (marcas nulas ordenadas como texto vazio)
+def ordenar_vendas_marca(linhas, coluna='total_vendas', decrescente=True):
+    if coluna == 'marca':
+        chave = lambda linha: linha[0] or ''
+    elif decrescente:
+        chave = lambda linha: (-linha[1], linha[0] or '')
+    else:
+        chave = lambda linha: (linha[1], linha[0] or '')
+    return sorted(linhas, key=chave, reverse=coluna == 'marca' and decrescente)
+
+# Cubo de vendas em memória com as dimensões (marca, país sede, ano) codificadas em arrays NumPy.
+# Responde aos filtros do dashboard com máscaras vetorizadas e bincount, sem consultar o banco.
+class CuboVendas:
+
+    # As linhas (marca, país sede, ano, total) podem vir de um gerador: são lidas uma vez, direto para as colunas
+    def __init__(self, linhas):
+        marcas, paises, anos, totais = [], [], [], []
+        for marca, pais_sede, ano, total_vendas in linhas:
+            marcas.append(marca)
+            paises.append(pais_sede)
+            anos.append(ano)
+            totais.append(total_vendas)
+
+        self.marcas, self.indice_marca, self.cod_marca = codificar(marcas)
+        self.paises, self.indice_pais, self.cod_pais = codificar(paises)
+        self.anos, self.indice_ano, self.cod_ano = codificar(anos)
+        self.totais = np.asarray(totais, dtype=np.int64)
+
+        # Índice de disponibilidade ano <-> país sede, reconstruído junto com o cubo
+        pares = np.unique(self.cod_ano.astype(np.int64) * len(self.paises) + self.cod_pais)
+        self.disponibilidade = disponibilidade.IndiceDisponibilidade(
+            (self.anos[par // len(self.paises)], self.paises[par % len(self.paises)]) for par in pares.tolist()
+        )
+
+    # Carrega os agregados (marca, país sede, ano) a partir da tabela de agregados, transmitidos em lotes
+    @classmethod
+    def carregar(cls):
+        return cls(transmitir(select(
+            VendasAgregadas.marca,
+            VendasAgregadas.pais_sede,
+            VendasAgregadas.ano,
+            VendasAgregadas.total_vendas
+        )))
+
+    # Máscara booleana das linhas que atendem aos filtros de ano e país sede
+    def mascara(self, ano_selecionado=None, pais_selecionado=None):
+        mascara = np.ones(len(self.totais), dtype=bool)
+        if ano_selecionado and ano_selecionado != 'todos':
+            codigo = self.indice_ano.get(int(ano_selecionado))
+            mascara &= self.cod_ano == (-1 if codigo is None else codigo)
+        if pais_selecionado and pais_selecionado != 'todos':
+            codigo = self.indice_pais.get(pais_selecionado)
+            mascara &= self.cod_pais == (-1 if codigo is None else codigo)
+        return mascara
+
+    def vendas_por_marca_pais(self, ano_selecionado, pais_selecionado):
+        mascara = self.mascara(ano_selecionado, pais_selecionado)
+        quantidade_paises = len(self.paises)
+        chave = self.cod_marca[mascara].astype(np.int64) * quantidade_paises + self.cod_pais[mascara]
+        somas = np.bincount(chave, weights=self.totais[mascara], minlength=len(self.marcas) * quantidade_paises)
+        chaves = np.flatnonzero(somas)
+        return [
+            (self.marcas[chave // quantidade_paises], self.paises[chave % quantidade_paises], int(somas[chave]))
+            for chave in chaves.tolist()
+        ]
+
+    def vendas_por_marca(self, ano_selecionado, pais_selecionado):
+        mascara = self.mascara(ano_selecionado, pais_selecionado)
+        somas = np.bincount(self.cod_marca[mascara], weights=self.totais[mascara], minlength=len(self.marcas))
+        codigos = np.flatnonzero(somas)
+        # Ordena pelo total decrescente e, em caso de empate, pela marca (os códigos seguem a ordem alfabética)
+        codigos = codigos[np.lexsort((codigos, -somas[codigos]))]
+        return [(self.marcas[codigo], int(somas[codigo])) for codigo in codigos.tolist()]
+
+    def total_vendas(self, ano_selecionado, pais_selecionado):
+        mascara = self.mascara(ano_selecionado, pais_selecionado)
+        if not mascara.any():
+            return None
+        return int(self.totais[mascara].sum())
+
+    # Cubo em formato compacto para o navegador: dicionários das dimensões e arrays de códigos
+    def para_cliente(self):
+        return {
+            'marcas': self.marcas,
+            'paises': self.paises,
+            'anos': self.anos,
+            'marca': self.cod_marca.tolist(),
+            'pais': self.cod_pais.tolist(),
+            'ano': self.cod_ano.tolist(),
+            'total': self.totais.tolist(),
+        }
+
+# Cubo compartilhado pelos callbacks, recarregado do banco quando a marca d'água dos agregados muda.
+# Assim o cache de resultados, limpo na mesma mudança, não é preenchido de novo com o cubo anterior.
+_cubo = None
+_marca_cubo = None
+_trava = threading.Lock()
+
+def obter_cubo():
+    global _cubo, _marca_cubo
+    marca = cache.cache_resultados.marca_dagua_atual()
+    if _cubo is None or marca != _marca_cubo:
+        with _trava:
+            if _cubo is None or marca != _marca_cubo:
+                _cubo = CuboVendas.carregar()
+                _marca_cubo = marca
+    return _cubo
+
+# Funções com a mesma interface do módulo agregados, usadas pelos callbacks em main_app.py
+
+# Marca d'água do cubo: a da tabela de agregados, de onde ele é carregado
+def marca_dagua():
+    return marca_dagua_agregados()
+
+def resumo_vendas(ano_selecionado, pais_selecionado):
+    cubo = obter_cubo()
+    return (
+        cubo.vendas_por_marca_pais(ano_selecionado, pais_selecionado),
+        cubo.vendas_por_marca(ano_selecionado, pais_selecionado),
+        cubo.total_vendas(ano_selecionado, pais_selecionado)
+    )
+
+def opcoes_paises(ano_selecionado):
+    return obter_cubo().disponibilidade.opcoes_paises(ano_selecionado)
+
+def opcoes_anos(pais_selecionado):
+    return obter_cubo().disponibilidade.opcoes_anos(pais_selecionado)
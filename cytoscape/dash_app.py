@@ -2,131 +2,167 @@
 # dash_app.py
 
 # Importar as bibliotecas necessárias
+import os
 import dash_cytoscape as cyto
 import dash_bootstrap_components as dbc
 from dash import Dash, html, dcc, dash_table
+import fontes
+import diff_grafo
 from db import *
-from funcoes import gerar_elemento_grafico, gerar_opcoes_dropdown
+
+# Modo de filtragem: no servidor (padrão) ou no navegador, habilitado com DASH_MODO=cliente.
+# No modo cliente, os agregados são enviados uma única vez com o layout e os callbacks do painel
+# rodam no navegador (assets/painel_cliente.js).
+modo_cliente = os.environ.get("DASH_MODO") == "cliente"
+
+# Quantidade de marcas por página da tabela de vendas, paginada e ordenada no servidor
+tabela_tamanho_pagina = int(os.environ.get("DASH_TABELA_TAMANHO_PAGINA", "50"))
 
 # Cria o aplicativo Dash
 app = Dash(__name__, external_stylesheets=[dbc.themes.CERULEAN], suppress_callback_exceptions=True)
 
+# Devolve a sessão da requisição (e sua conexão) ao pool ao final de cada requisição
+@app.server.teardown_appcontext
+def remover_sessao(excecao=None):
+    Session.remove()
+
 # Define o estilo CSS com bordas arredondadas
 estilo_bordas_arredondadas = {
     'borderRadius': '10px',
 }
 
-# Consulta SQL para recuperar os dados iniciais
-dados_iniciais = session.query(Carro.marca, Carro.pais_sede, Vendas.valor_venda).join(Vendas).all()
+# Layout do aplicativo, montado a cada carregamento da página e não na importação do módulo.
+# Os dados iniciais vêm do resumo agregado (em cache), então o tempo de inicialização
+# não depende do tamanho da tabela de vendas.
+def criar_layout():
+    # Cria uma lista de nós e arestas, já posicionados, para o gráfico de rede com os dados iniciais
+    elementos_grafico_todos_anos = fontes.grafo_vendas('todos', 'todos')
+
+    return dbc.Container(children=[
+        html.H1(children=[
+            "Dashboard de Vendas: ",
+            html.Span(id='marca-selecionada')
+        ]),
 
-# Cria as opções para o dropdown de países sede
-opcoes_dropdown_paises = session.query(Carro.pais_sede.distinct()).all()
-opcoes_dropdown_paises = [{'label': pais[0], 'value': pais[0]} for pais in opcoes_dropdown_paises]
+        # Filtro selecionado nos dropdowns (ano, país sede), entrada do callback único do painel
+        dcc.Store(id='filtro-estado', data={'ano': 'todos', 'pais': 'todos'}),
 
-# Cria uma lista de nós e arestas para o gráfico de rede com os dados iniciais
-elementos_grafico_todos_anos = []
-for linha in dados_iniciais:
-    elementos_grafico_todos_anos += gerar_elemento_grafico(linha[0], linha[1], linha[2])
+        # Filtro e versão do gráfico de rede exibido no navegador, base das atualizações incrementais
+        dcc.Store(id='grafo-estado', data=diff_grafo.estado_grafo('todos', 'todos', elementos_grafico_todos_anos)),
 
-# Layout do aplicativo
-app.layout = dbc.Container(children=[
-    html.H1(children=[
-        "Dashboard de Vendas: ",
-        html.Span(id='marca-selecionada')
-    ]),
+        # Agregados codificados usados pelos callbacks do navegador no modo cliente
+        dcc.Store(id='cubo-cliente', data=fontes.dados_cliente() if modo_cliente else None),
     
-    # Dropdown para seleção do país sede
-    html.Div([
-        html.Label("País Sede: "),
-        html.Span(id='quantidade-paises', style={'margin-left': '10px'}),
-        dcc.Dropdown(
-            id='dropdown-pais-sede',
-            options=opcoes_dropdown_paises,
-            value='todos',
-            clearable=False,
-            className='form-control',
-            style=estilo_bordas_arredondadas
-        )
-    ], style={'display': 'inline-block', 'width': '25%'}),
+        # Dropdown para seleção do país sede
+        html.Div([
+            html.Label("País Sede: "),
+            html.Span(id='quantidade-paises', style={'margin-left': '10px'}),
+            dcc.Dropdown(
+                id='dropdown-pais-sede',
+                options=fontes.opcoes_paises('todos'),
+                value='todos',
+                clearable=False,
+                className='form-control',
+                style=estilo_bordas_arredondadas
+            )
+        ], style={'display': 'inline-block', 'width': '25%'}),
 
-    # Separador
-    html.Span('|', style={'display': 'inline-block', 'margin': '0px 5px'}),
+        # Separador
+        html.Span('|', style={'display': 'inline-block', 'margin': '0px 5px'}),
     
-    # Dropdown para seleção do ano das vendas
-    html.Div([
-        html.Label("Ano das Vendas:"),
-        html.Span(id='quantidade-anos', style={'margin-left': '10px'}),
-        dcc.Dropdown(
-            id='dropdown-ano',
-            options=gerar_opcoes_dropdown('ano', cst_dropdown_anos),
-            value='todos',
-            clearable=False,
-            className='form-control',
-            style=estilo_bordas_arredondadas
-        )
-    ], style={'width': '25%', 'display': 'inline-block'}),
+        # Dropdown para seleção do ano das vendas
+        html.Div([
+            html.Label("Ano das Vendas:"),
+            html.Span(id='quantidade-anos', style={'margin-left': '10px'}),
+            dcc.Dropdown(
+                id='dropdown-ano',
+                options=fontes.opcoes_anos('todos'),
+                value='todos',
+                clearable=False,
+                className='form-control',
+                style=estilo_bordas_arredondadas
+            )
+        ], style={'width': '25%', 'display': 'inline-block'}),
     
-    html.Hr(),
+        html.Hr(),
     
-    # Dois elementos lado a lado: Gráfico de Rede e Tabela de Vendas
-    dbc.Row([
-        # Coluna do Gráfico de Rede
-        dbc.Col([
-            html.Label("Gráfico de Rede:"),
-            html.Div(
-                cyto.Cytoscape(
-                    id='graph-rede',
-                    layout={'name': 'breadthfirst'},
-                    style={'width': '100%', 'height': '70vh'},
-                    elements=elementos_grafico_todos_anos,
-                    stylesheet=[
-                    # Estilo dos nós
-                    {
-                        'selector': 'node',
-                        'style': {
-                            'label': 'data(label)',
-                            'background-color': '#48A5DB'
-                        }
-                    },
-                    # Estilo do nó "total_vendas" com alinhamento ao centro
-                    {
-                        'selector': 'node[tipo="total_vendas"]',
-                        'style': {
-                            'label': 'data(label)',
-                            'background-color': '#48A5DB',
-                            'text-valign': 'center',
-                            'text-halign': 'center'
+        # Dois elementos lado a lado: Gráfico de Rede e Tabela de Vendas
+        dbc.Row([
+            # Coluna do Gráfico de Rede
+            dbc.Col([
+                html.Label("Gráfico de Rede:"),
+                html.Div(
+                    cyto.Cytoscape(
+                        id='graph-rede',
+                        layout={'name': 'preset'},
+                        style={'width': '100%', 'height': '70vh'},
+                        elements=elementos_grafico_todos_anos,
+                        stylesheet=[
+                        # Estilo dos nós
+                        {
+                            'selector': 'node',
+                            'style': {
+                                'label': 'data(label)',
+                                'background-color': '#48A5DB'
+                            }
+                        },
+                        # Estilo do nó "total_vendas" com alinhamento ao centro
+                        {
+                            'selector': 'node[tipo="total_vendas"]',
+                            'style': {
+                                'label': 'data(label)',
+                                'background-color': '#48A5DB',
+                                'text-valign': 'center',
+                                'text-halign': 'center'
+                            }
+                        },
+                        # Estilo do nó que agrega as demais marcas de um país sede
+                        {
+                            'selector': 'node[tipo="outras_marcas"]',
+                            'style': {
+                                'label': 'data(label)',
+                                'background-color': '#A0A0A0'
+                            }
+                        },
+                        # Estilo das arestas
+                        {
+                            'selector': 'edge',
+                            'style': {
+                                'label': 'data(label)',
+                                'line-color': '#7BD8FE'
+                            }
                         }
-                    },
-                    # Estilo das arestas
-                    {
-                        'selector': 'edge',
-                        'style': {
-                            'label': 'data(label)',
-                            'line-color': '#7BD8FE'
-                        }
-                    }
-                ]
-            ),
-                style={'border': '1px solid gray', 'borderRadius': '10px', 'padding': '10px', 'color':'white'}
-            )
-        ], width=9),
-        
-        # Coluna da Tabela de Vendas
-        dbc.Col([
-            html.Label("Total de Vendas por Marca: "),
-            html.Span(id='total-geral'),
-            html.Div(
-                dash_table.DataTable(
-                    id='tabela-vendas',
-                    sort_action='native',
-                    columns=[{"name": "Marca", "id": "marca"}, {"name": "Total de Vendas", "id": "total_vendas"}],
-                    style_table={'height': '70vh', 'overflowY': 'auto', 'borderCollapse': 'separate', 'borderSpacing': '0px'},
-                    style_header={'backgroundColor': '#48A5DB', 'fontWeight': 'bold'},
-                    style_cell={'padding': '8px', 'border': '1px solid gray', 'borderRadius': '10px', 'fontSize': '10px'}
+                    ]
                 ),
-                style={'border': '1px solid gray', 'borderRadius': '10px', 'padding': '10px', 'color':'black'}
-            )
-        ], width=3)
+                    style={'border': '1px solid gray', 'borderRadius': '10px', 'padding': '10px', 'color':'white'}
+                )
+            ], width=9),
+        
+            # Coluna da Tabela de Vendas
+            dbc.Col([
+                html.Label("Total de Vendas por Marca: "),
+                html.Span(id='total-geral'),
+                html.Div(
+                    dash_table.DataTable(
+                        id='tabela-vendas',
+                        # No modo servidor, o callback envia apenas a página visível, já ordenada;
+                        # no modo cliente, a tabela completa está no navegador
+                        sort_action='native' if modo_cliente else 'custom',
+                        sort_mode='single',
+                        sort_by=[],
+                        page_action='native' if modo_cliente else 'custom',
+                        page_current=0,
+                        page_size=tabela_tamanho_pagina,
+                        columns=[{"name": "Marca", "id": "marca"}, {"name": "Total de Vendas", "id": "total_vendas"}],
+                        style_table={'height': '70vh', 'overflowY': 'auto', 'borderCollapse': 'separate', 'borderSpacing': '0px'},
+                        style_header={'backgroundColor': '#48A5DB', 'fontWeight': 'bold'},
+                        style_cell={'padding': '8px', 'border': '1px solid gray', 'borderRadius': '10px', 'fontSize': '10px'}
+                    ),
+                    style={'border': '1px solid gray', 'borderRadius': '10px', 'padding': '10px', 'color':'black'}
+                )
+            ], width=3)
+        ])
     ])
-])
+
+# O Dash chama criar_layout a cada carregamento da página
+app.layout = criar_layout
@@ -2,10 +2,15 @@
 # db.py
 
 import os
+import time
+import threading
+from datetime import date
 from sqlalchemy import *
 from dotenv import load_dotenv
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session as SessaoOrm, sessionmaker, scoped_session
 from sqlalchemy.ext.declarative import declarative_base
+import metricas
+import consultas_lentas
 
 # Impporte as varáveis de ambiente de .env.
 load_dotenv(".env")
@@ -14,12 +19,130 @@ db_pass = os.environ.get("DB_PASS")
 db_host = os.environ.get("DB_HOST")
 db_data = os.environ.get("DB_DATA")
 
-# Crie uma instância da engine para se conectar ao banco de dados PostgreSQL
-db_url = f'postgresql://{db_user}:{db_pass}@{db_host}/{db_data}'
-engine = create_engine(db_url)
+# Configuração do pool de conexões. Cada requisição usa uma conexão por vez (db.transmitir devolve a conexão
+# da sessão ao terminar a consulta), então DB_POOL_SIZE + DB_MAX_OVERFLOW deve ser pelo menos o número de
+# threads de cada processo do servidor; o pool é criado em cada processo.
+db_pool_size = int(os.environ.get("DB_POOL_SIZE", "5"))
+db_max_overflow = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+db_pool_timeout = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+db_pool_recycle = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
 
-Session = sessionmaker(bind=engine)
-session = Session()
+# Quantidade de linhas lidas por vez do cursor no servidor nas consultas transmitidas
+db_lote_consulta = int(os.environ.get("DB_LOTE_CONSULTA", "2000"))
+
+# Banco de dados lido pelo dashboard: PostgreSQL (padrão) ou DuckDB (DB_BACKEND=duckdb), um banco colunar
+# embutido, em um arquivo local, que executa as varreduras e agregações de forma vetorizada e em várias threads.
+# O arquivo do DuckDB é gerado a partir do PostgreSQL por sincronizar_duckdb.py e aberto somente para leitura.
+db_backend = os.environ.get("DB_BACKEND", "postgresql")
+db_duckdb_caminho = os.environ.get("DB_DUCKDB_CAMINHO", "dados/vendas.duckdb")
+db_duckdb_threads = int(os.environ.get("DB_DUCKDB_THREADS", "0"))  # 0 usa todos os núcleos
+
+# URL do banco de dados PostgreSQL
+db_url_postgresql = f'postgresql://{db_user}:{db_pass}@{db_host}/{db_data}'
+
+# URL de um arquivo do DuckDB
+def url_duckdb(caminho):
+    return f'duckdb:///{caminho}'
+
+# URL do banco de dados lido pelo dashboard
+db_url = url_duckdb(db_duckdb_caminho) if db_backend == 'duckdb' else db_url_postgresql
+
+# Argumentos de conexão do DuckDB: threads da execução vetorizada e modo somente leitura,
+# que permite a vários processos do servidor abrirem o mesmo arquivo
+def argumentos_duckdb(somente_leitura=True):
+    argumentos = {'read_only': somente_leitura}
+    if db_duckdb_threads > 0:
+        argumentos['config'] = {'threads': db_duckdb_threads}
+    return argumentos
+
+# Registro da última sincronização do arquivo do DuckDB, gravado por sincronizar_duckdb.py.
+# Cada sincronização gera um arquivo novo, então o momento da sincronização entra na marca d'água dos agregados.
+# Fica fora de Base.metadata: existe apenas no arquivo do DuckDB.
+tabela_sincronizacao = Table('sincronizacao', MetaData(), Column('sincronizado_em', DOUBLE))
+
+# Identificação (inode, data de modificação) do arquivo do DuckDB, ou None se ele não existir
+def identificar_arquivo_duckdb():
+    try:
+        estado = os.stat(db_duckdb_caminho)
+    except FileNotFoundError:
+        return None
+    return estado.st_ino, estado.st_mtime_ns
+
+# A engine é criada apenas na primeira consulta, e não na importação do módulo
+_engine = None
+_arquivo_engine = None
+_trava_engine = threading.Lock()
+
+# Retorna a engine para se conectar ao banco de dados, criando-a na primeira utilização.
+# No DuckDB, quando a sincronização substitui o arquivo, as conexões abertas com o arquivo anterior
+# são descartadas e as próximas consultas abrem o arquivo novo. O DuckDB compartilha o arquivo aberto entre as
+# conexões do processo, então uma consulta ainda em andamento mantém o arquivo anterior até terminar.
+def obter_engine():
+    global _engine, _arquivo_engine
+    if _engine is not None and db_backend == 'duckdb':
+        arquivo = identificar_arquivo_duckdb()
+        if arquivo != _arquivo_engine:
+            with _trava_engine:
+                if arquivo != _arquivo_engine:
+                    _engine.dispose()
+                    _arquivo_engine = arquivo
+    if _engine is None:
+        with _trava_engine:
+            if _engine is None:
+                if db_backend == 'duckdb':
+                    _arquivo_engine = identificar_arquivo_duckdb()
+                    engine = create_engine(
+                        db_url,
+                        connect_args=argumentos_duckdb(),
+                        pool_recycle=db_pool_recycle,
+                        pool_pre_ping=True
+                    )
+                else:
+                    engine = create_engine(
+                        db_url,
+                        pool_size=db_pool_size,
+                        max_overflow=db_max_overflow,
+                        pool_timeout=db_pool_timeout,
+                        pool_recycle=db_pool_recycle,
+                        pool_pre_ping=True
+                    )
+                # Instruções acima de DB_CONSULTA_LENTA_SEGUNDOS vão para o log de consultas lentas
+                consultas_lentas.instrumentar_engine(engine)
+                _engine = engine
+    return _engine
+
+# Sessão que obtém a engine somente ao executar a primeira consulta
+class SessaoBanco(SessaoOrm):
+    def get_bind(self, *args, **kwargs):
+        return obter_engine()
+
+# Sessão por thread: cada requisição usa sua própria sessão, descartada ao final da requisição com Session.remove().
+# A conexão do pool fica com a sessão apenas durante cada consulta (db.transmitir).
+Session = scoped_session(sessionmaker(class_=SessaoBanco))
+session = Session
+
+# Função para executar uma consulta com cursor no servidor, transmitindo as linhas em lotes de
+# db_lote_consulta em vez de materializar o resultado inteiro. Usa a sessão da requisição ou a conexão informada;
+# o cursor é fechado quando as linhas terminam de ser consumidas ou o gerador é descartado. Com a sessão,
+# a transação também é encerrada e a conexão volta ao pool, para que a marca d'água e as demais consultas
+# da mesma requisição não precisem de uma segunda conexão.
+# A duração da consulta, da execução até o fechamento do cursor, vai para o log de consultas lentas.
+def transmitir(consulta, lote=None, conexao=None):
+    inicio = time.perf_counter()
+    resultado = (conexao or session).execute(consulta.execution_options(yield_per=lote or db_lote_consulta))
+    try:
+        for particao in resultado.partitions():
+            metricas.registrar_linhas(len(particao))
+            yield from particao
+    finally:
+        resultado.close()
+        duracao = time.perf_counter() - inicio
+        if 0 < consultas_lentas.consulta_lenta_segundos <= duracao:
+            # Nas consultas da sessão com entidades do ORM, o cursor é o resultado bruto (raw)
+            contexto = getattr(resultado, 'raw', resultado).context
+            consultas_lentas.enviar(contexto.root_connection.engine, duracao, contexto.statement, contexto.parameters[0])
+        if conexao is None:
+            session.close()
 
 # Crie a classe base do SQLAlchemy
 Base = declarative_base()
@@ -46,33 +169,8 @@ class Carro(Base):
     data_entrada = Column(DATE)
     pais_sede = Column(String)
 
-# Crie as tabelas no banco de dados, caso ainda não existam
-Base.metadata.create_all(engine)
-
-cst_inicial = (
-    session.query(
-    Carro.marca,
-    Carro.pais_sede,
-    func.count(Vendas.id_venda)
-    .label("total_vendas"))
-    .join(Vendas, Vendas.id_carro == Carro.id_carro)
-    .group_by(Carro.marca, Carro.pais_sede)
-)
-
-# Consulta para obter as opções para dropdown Anos
-cst_dropdown_anos = (
-    session.query(
-        extract('year', Vendas.data_venda).label('ano')
-    )
-    .distinct()
-    .order_by('ano')
-)
-
-# Consulta para obter as opções para dropdown Países
-cst_dropdown_paises = (
-    session.query(
-        distinct(Carro.pais_sede)
-    )
-)
-
-session.close()
+# Filtro de ano como intervalo semiaberto [1º de janeiro, 1º de janeiro do ano seguinte).
+# Ao contrário de extract('year', coluna) == ano, pode ser resolvido com um índice na coluna de data.
+def filtro_ano(coluna, ano):
+    ano = int(ano)
+    return and_(coluna >= date(ano, 1, 1), coluna < date(ano + 1, 1, 1))
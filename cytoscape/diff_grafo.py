@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# diff_grafo.py
+
+# Atualização incremental dos elementos do gráfico de rede: em vez de reenviar a lista completa,
+# o servidor envia apenas as remoções, as inclusões e as mudanças dos elementos (Patch do Dash).
+# O navegador guarda somente o filtro do gráfico exibido e a versão da sua lista de elementos. Como o gráfico
+# de um filtro é determinístico e fica em cache (fontes.grafo_vendas), o servidor calcula a diferença
+# entre os dois resultados em cache, e a lista exibida não precisa ir e voltar a cada requisição.
+
+# Importar as bibliotecas necessárias
+import hashlib
+from dash import Patch, no_update
+
+# Acima desta fração de elementos incluídos, removidos ou alterados, a lista completa é menor que o patch.
+# Mudanças apenas no rótulo dos nós de total de vendas não contam: cada uma vira uma atribuição curta no patch.
+fracao_maxima_alterada = 0.5
+
+# Ordem canônica dos elementos: nós e depois arestas, cada grupo ordenado por id. Com a mesma ordem
+# nas duas listas, a lista do navegador depois do patch é igual à lista nova.
+def ordenar_elementos(elementos):
+    return sorted(elementos, key=lambda elemento: ('source' in elemento['data'], elemento['data']['id']))
+
+# Versão de uma lista de elementos, usada para confirmar que o navegador exibe o resultado atual em cache
+def versao_grafo(elementos):
+    return hashlib.sha1(repr(elementos).encode('utf-8')).hexdigest()[:16]
+
+# Estado do gráfico no navegador: o filtro exibido e a versão da sua lista de elementos
+def estado_grafo(ano_selecionado, pais_selecionado, elementos):
+    return {'ano': ano_selecionado, 'pais': pais_selecionado, 'versao': versao_grafo(elementos)}
+
+# Verifica se o elemento mudou apenas no rótulo de um nó de total de vendas
+def apenas_rotulo_total(anterior, novo):
+    return (
+        anterior['data'].get('tipo') == 'total_vendas'
+        and anterior.get('position') == novo.get('position')
+        and dict(anterior['data'], label=None) == dict(novo['data'], label=None)
+    )
+
+# Calcula a atualização da propriedade elements do gráfico e o novo estado do navegador.
+# elementos_anteriores é o resultado em cache do filtro de estado_anterior; a lista completa é enviada
+# quando não há estado anterior, quando esse resultado mudou desde que foi enviado (novos dados)
+# ou quando a maior parte dos elementos mudou.
+def diferenca_grafo(estado_anterior, elementos_anteriores, elementos, ano_selecionado, pais_selecionado):
+    novo_estado = estado_grafo(ano_selecionado, pais_selecionado, elementos)
+    if (not isinstance(estado_anterior, dict) or elementos_anteriores is None
+            or estado_anterior.get('versao') != versao_grafo(elementos_anteriores)):
+        return elementos, novo_estado
+    if novo_estado['versao'] == estado_anterior['versao']:
+        return no_update, novo_estado
+
+    novos = {elemento['data']['id']: elemento for elemento in elementos}
+    ids_anteriores = {elemento['data']['id'] for elemento in elementos_anteriores}
+
+    removidos = [
+        indice for indice, elemento in enumerate(elementos_anteriores)
+        if elemento['data']['id'] not in novos
+    ]
+    incluidos = [
+        (indice, elemento) for indice, elemento in enumerate(elementos)
+        if elemento['data']['id'] not in ids_anteriores
+    ]
+    rotulos, alterados = [], []
+    for anterior in elementos_anteriores:
+        novo = novos.get(anterior['data']['id'])
+        if novo is None or novo == anterior:
+            continue
+        (rotulos if apenas_rotulo_total(anterior, novo) else alterados).append(novo)
+
+    if len(removidos) + len(incluidos) + len(alterados) > fracao_maxima_alterada * max(len(elementos), 1):
+        return elementos, novo_estado
+
+    # Os índices das atribuições são os da lista nova, válidos depois das remoções e inclusões
+    indices = {elemento['data']['id']: indice for indice, elemento in enumerate(elementos)}
+    patch = Patch()
+    # Remove do fim para o início, para que os índices restantes continuem válidos, e inclui em ordem crescente
+    for indice in reversed(removidos):
+        del patch[indice]
+    for indice, elemento in incluidos:
+        patch.insert(indice, elemento)
+    for elemento in alterados:
+        patch[indices[elemento['data']['id']]] = elemento
+    for elemento in rotulos:
+        patch[indices[elemento['data']['id']]]['data']['label'] = elemento['data']['label']
+
+    return patch, novo_estado
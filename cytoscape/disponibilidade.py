@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# disponibilidade.py
+
+# Índice de disponibilidade ano <-> país sede para os dropdowns dependentes.
+# É montado uma vez a partir dos pares (ano, país sede) existentes e reconstruído quando os dados mudam,
+# então os callbacks de opções respondem da memória, sem consultar o banco nem ordenar valores.
+
+# Importar as bibliotecas necessárias
+from collections import defaultdict
+import funcoes
+
+class IndiceDisponibilidade:
+
+    def __init__(self, pares):
+        paises_por_ano = defaultdict(set)
+        anos_por_pais = defaultdict(set)
+        for ano, pais_sede in pares:
+            ano = int(ano) if ano is not None else None
+            paises_por_ano[ano].add(pais_sede)
+            anos_por_pais[pais_sede].add(ano)
+
+        # Arrays ordenados: ano -> países sede e país sede -> anos (valores nulos não viram opções)
+        self.paises_por_ano = {ano: tuple(sorted(paises - {None})) for ano, paises in paises_por_ano.items() if ano is not None}
+        self.anos_por_pais = {pais_sede: tuple(sorted(anos - {None})) for pais_sede, anos in anos_por_pais.items() if pais_sede is not None}
+        self.anos = tuple(sorted(self.paises_por_ano))
+        self.paises = tuple(sorted(self.anos_por_pais))
+
+        # Opções dos dropdowns já formatadas para cada filtro
+        self._opcoes_paises = {ano: funcoes.formatar_opcoes_dropdown(list(paises)) for ano, paises in self.paises_por_ano.items()}
+        self._opcoes_anos = {pais_sede: funcoes.formatar_opcoes_dropdown(list(anos)) for pais_sede, anos in self.anos_por_pais.items()}
+        self._todos_paises = funcoes.formatar_opcoes_dropdown(list(self.paises))
+        self._todos_anos = funcoes.formatar_opcoes_dropdown(list(self.anos))
+        self._nenhum = funcoes.formatar_opcoes_dropdown([])
+
+    # Opções do dropdown de países sede com vendas no ano selecionado
+    def opcoes_paises(self, ano_selecionado):
+        if not ano_selecionado or ano_selecionado == 'todos':
+            return self._todos_paises
+        try:
+            return self._opcoes_paises.get(int(ano_selecionado), self._nenhum)
+        except (TypeError, ValueError):
+            return self._nenhum
+
+    # Opções do dropdown de anos com vendas no país sede selecionado
+    def opcoes_anos(self, pais_selecionado):
+        if not pais_selecionado or pais_selecionado == 'todos':
+            return self._todos_anos
+        return self._opcoes_anos.get(pais_selecionado, self._nenhum)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# fontes.py
+
+# Importar as bibliotecas necessárias
+import os
+import cache
+import cubo
+import funcoes
+import diff_grafo
+import layout_grafo
+
+# Fonte dos dados do dashboard: tabela de agregados no banco (padrão),
+# cubo NumPy em memória, habilitado com DASH_FONTE=cubo,
+# ou snapshot Parquet das vendas, habilitado com DASH_FONTE=parquet (snapshot_parquet.py)
+if os.environ.get("DASH_FONTE") == "cubo":
+    import cubo as fonte
+elif os.environ.get("DASH_FONTE") == "parquet":
+    import snapshot_parquet as fonte
+else:
+    import agregados as fonte
+
+# O cache de resultados é invalidado pela marca d'água da fonte selecionada
+cache.cache_resultados.marca_dagua = fonte.marca_dagua
+
+# Resumo de vendas guardado em cache por (ano, país sede) e invalidado quando os agregados mudam
+resumo_vendas = cache.em_cache(fonte.resumo_vendas)
+
+# Vendas por marca na ordem escolhida na tabela, em cache por filtro, coluna e direção. São ordenadas a partir
+# das vendas por marca do resumo em cache (o mesmo usado para a quantidade de páginas), sem uma segunda consulta à fonte.
+@cache.em_cache
+def vendas_marca_ordenadas(ano_selecionado, pais_selecionado, coluna='total_vendas', decrescente=True):
+    _, vendas_marca, _ = resumo_vendas(ano_selecionado, pais_selecionado)
+    return cubo.ordenar_vendas_marca(vendas_marca, coluna, decrescente)
+
+# Linhas de uma página da tabela de vendas, recortadas da lista ordenada em cache
+def pagina_vendas_marca(ano_selecionado, pais_selecionado, coluna='total_vendas', decrescente=True,
+                        pagina=0, tamanho=50):
+    linhas = vendas_marca_ordenadas(ano_selecionado, pais_selecionado, coluna, decrescente)
+    return linhas[pagina * tamanho:(pagina + 1) * tamanho]
+
+# Opções dos dropdowns de países sede e de anos
+opcoes_paises = fonte.opcoes_paises
+opcoes_anos = fonte.opcoes_anos
+
+# Elementos do gráfico de rede, com as posições dos nós calculadas no servidor, em cache por filtro.
+# As posições são derivadas da ordem das vendas de todos os anos e países, então ficam estáveis
+# entre filtros e iguais em todos os processos do servidor. Os elementos ficam na ordem canônica
+# de diff_grafo, base das atualizações incrementais do gráfico no navegador.
+@cache.em_cache
+def grafo_vendas(ano_selecionado, pais_selecionado):
+    vendas_marca_pais, _, _ = resumo_vendas(ano_selecionado, pais_selecionado)
+    vendas_referencia, _, _ = resumo_vendas('todos', 'todos')
+
+    linhas = funcoes.limitar_grafo(vendas_marca_pais)
+    elementos = funcoes.gerar_elementos_grafico(linhas)
+    elementos = layout_grafo.posicionar(elementos, layout_grafo.calcular_posicoes(linhas, vendas_referencia))
+    return diff_grafo.ordenar_elementos(elementos)
+
+# Agregados (marca, país sede, ano) codificados em arrays, enviados uma única vez ao navegador no modo
+# cliente (DASH_MODO=cliente), junto com os parâmetros usados para montar e posicionar o gráfico de rede
+@cache.em_cache
+def dados_cliente():
+    carregar_cubo = getattr(fonte, 'carregar_cubo', cubo.CuboVendas.carregar)
+    dados = carregar_cubo().para_cliente()
+    dados.update({
+        'limite_marcas': funcoes.grafo_marcas_por_pais,
+        'espacamento_x': layout_grafo.espacamento_x,
+        'espacamento_y': layout_grafo.espacamento_y,
+    })
+    return dados
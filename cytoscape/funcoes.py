@@ -1,25 +1,97 @@
 #!/usr/bin/env python
 
 # Importar as bibliotecas necessárias
-from db import *
+import os
+from collections import namedtuple, defaultdict
 
-# Função para gerar elementos do gráfico de rede para um nó específico
-def gerar_elemento_grafico(marca, pais_sede, total_vendas=None):
-    elementos = [{'data': {'id': marca, 'label': marca}}]
+# Quantidade máxima de marcas exibidas por país sede no gráfico de rede (0 exibe todas).
+# As demais marcas de cada país são somadas em um único nó "Outras marcas".
+grafo_marcas_por_pais = int(os.environ.get("DASH_GRAFO_MARCAS_POR_PAIS", "10"))
 
-    if pais_sede is not None:
-        elementos.append({'data': {'id': pais_sede, 'label': pais_sede}})
-        elementos.append({'data': {'source': pais_sede, 'target': marca}})
+# Marca agregada de um país sede, com a quantidade de marcas que ela representa
+OutrasMarcas = namedtuple('OutrasMarcas', ['quantidade'])
+
+# Ids dos nós do gráfico de rede, únicos por tipo e estáveis entre consultas
+def id_pais(pais_sede):
+    return f'pais:{pais_sede}'
+
+def id_marca(marca):
+    return f'marca:{marca}'
+
+def id_total(marca, pais_sede):
+    return f'total:{pais_sede}:{marca}'
+
+def id_outras_marcas(pais_sede):
+    return f'outras:{pais_sede}'
+
+# Função para gerar, em uma única passada, os nós e as arestas do gráfico de rede a partir de
+# todas as linhas (marca, pais_sede, total_vendas) do resultado. Cada país e cada marca geram um
+# único nó, mesmo quando aparecem em várias linhas, e cada total de vendas tem seu próprio nó.
+def gerar_elementos_grafico(linhas):
+    elementos = []
+    ids_vistos = set()
+
+    for marca, pais_sede, total_vendas in linhas:
+        if isinstance(marca, OutrasMarcas):
+            no_marca = id_outras_marcas(pais_sede)
+            elementos.append({'data': {'id': no_marca, 'label': f'Outras marcas ({marca.quantidade})', 'tipo': 'outras_marcas'}})
+            ids_vistos.add(no_marca)
+        elif id_marca(marca) not in ids_vistos:
+            no_marca = id_marca(marca)
+            ids_vistos.add(no_marca)
+            elementos.append({'data': {'id': no_marca, 'label': marca, 'tipo': 'marca'}})
+        else:
+            no_marca = id_marca(marca)
+
+        if pais_sede is not None:
+            no_pais = id_pais(pais_sede)
+            if no_pais not in ids_vistos:
+                ids_vistos.add(no_pais)
+                elementos.append({'data': {'id': no_pais, 'label': pais_sede, 'tipo': 'pais'}})
+            aresta = f'{no_pais}->{no_marca}'
+            if aresta not in ids_vistos:
+                ids_vistos.add(aresta)
+                elementos.append({'data': {'id': aresta, 'source': no_pais, 'target': no_marca}})
+
+        if total_vendas is not None:
+            no_total = f'total:{no_marca}' if isinstance(marca, OutrasMarcas) else id_total(marca, pais_sede)
+            if no_total not in ids_vistos:
+                ids_vistos.add(no_total)
+                elementos.append({'data': {'id': no_total, 'label': str(total_vendas), 'tipo': 'total_vendas'}})
+                elementos.append({'data': {'id': f'{no_marca}->{no_total}', 'source': no_marca, 'target': no_total}})
 
-    if total_vendas is not None:
-        elementos.append({'data': {'id': str(total_vendas), 'label': str(total_vendas), 'tipo': 'total_vendas'}})
-        elementos.append({'data': {'source': marca, 'target': str(total_vendas)}})
-    
     return elementos
 
-# Função para gerar as opções do dropdown com base em uma coluna específica da consulta SQL
-def gerar_opcoes_dropdown(coluna, consulta):
-    valores = session.execute(consulta).all()
-    valores = [valor[0] for valor in valores if valor[0] is not None]
+# Mantém, em cada país sede, as marcas com mais vendas e soma as demais em uma linha OutrasMarcas,
+# limitando o tamanho do gráfico independentemente da quantidade de marcas do catálogo
+def limitar_marcas_por_pais(linhas, limite):
+    marcas_por_pais = defaultdict(list)
+    for marca, pais_sede, total_vendas in linhas:
+        marcas_por_pais[pais_sede].append((marca, total_vendas))
+
+    linhas_limitadas = []
+    for pais_sede, marcas in marcas_por_pais.items():
+        if len(marcas) > limite:
+            marcas.sort(key=lambda linha: (-(linha[1] or 0), str(linha[0])))
+            restantes = marcas[limite:]
+            marcas = marcas[:limite]
+            marcas.append((OutrasMarcas(len(restantes)), sum(total or 0 for _, total in restantes)))
+        linhas_limitadas.extend((marca, pais_sede, total_vendas) for marca, total_vendas in marcas)
+
+    return linhas_limitadas
+
+# Limita as linhas do gráfico de rede a grafo_marcas_por_pais marcas por país sede
+def limitar_grafo(linhas):
+    if grafo_marcas_por_pais > 0:
+        return limitar_marcas_por_pais(linhas, grafo_marcas_por_pais)
+    return linhas
+
+# Função para gerar os registros da tabela de vendas diretamente das linhas (marca, total_vendas)
+def gerar_registros_tabela(linhas):
+    return [{'marca': marca, 'total_vendas': total_vendas} for marca, total_vendas in linhas]
+
+# Função para formatar uma lista de valores como opções do dropdown, com a opção "Todos" no início
+def formatar_opcoes_dropdown(valores):
+    valores = [valor for valor in valores if valor is not None]
     valores.sort()
     return [{'label': 'Todos', 'value': 'todos'}] + [{'label': valor, 'value': valor} for valor in valores]
\ No newline at end of file
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# indices.py
+
+# Importar as bibliotecas necessárias
+import sys
+from sqlalchemy import Index, inspect, text
+from db import Vendas, Carro, obter_engine
+
+# Índices que sustentam as consultas do dashboard e a atualização dos agregados.
+# Os filtros de ano usam intervalos em data_venda (db.filtro_ano), resolvidos por varredura de faixa no índice.
+indices_dashboard = [
+    # Filtro por intervalo de data_venda, cobrindo as colunas usadas na agregação (index-only scan)
+    Index('ix_vendas_data_venda', Vendas.data_venda,
+          postgresql_include=['id_carro', 'id_venda', 'valor_venda']),
+    # Junção vendas x carros, opcionalmente restrita a um intervalo de datas
+    Index('ix_vendas_id_carro', Vendas.id_carro, Vendas.data_venda),
+    # Filtro por país sede, cobrindo a junção e a marca
+    Index('ix_carros_pais_sede', Carro.pais_sede,
+          postgresql_include=['id_carro', 'marca']),
+    # Busca de marca e país sede a partir de id_carro sem acessar a tabela carros
+    Index('ix_carros_id_carro_marca_pais', Carro.id_carro,
+          postgresql_include=['marca', 'pais_sede']),
+]
+
+# Retorna os nomes dos índices do dashboard que ainda não existem no banco de dados
+def verificar_indices():
+    inspetor = inspect(obter_engine())
+    existentes = {
+        tabela: {indice['name'] for indice in inspetor.get_indexes(tabela)}
+        for tabela in {indice.table.name for indice in indices_dashboard}
+    }
+    return [indice.name for indice in indices_dashboard if indice.name not in existentes[indice.table.name]]
+
+# Cria os índices ausentes e atualiza as estatísticas das tabelas para o planejador de consultas
+def criar_indices():
+    engine = obter_engine()
+    faltantes = verificar_indices()
+    for indice in indices_dashboard:
+        if indice.name in faltantes:
+            indice.create(engine)
+
+    if faltantes:
+        with engine.begin() as conexao:
+            for tabela in {indice.table.name for indice in indices_dashboard}:
+                conexao.execute(text(f'ANALYZE {tabela}'))
+
+    return faltantes
+
+# python indices.py            cria os índices ausentes
+# python indices.py verificar  lista os índices ausentes (código de saída 1 se houver algum)
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['verificar']:
+        faltantes = verificar_indices()
+        for nome in faltantes:
+            print(f'Índice ausente: {nome}')
+        sys.exit(1 if faltantes else 0)
+    else:
+        for nome in criar_indices():
+            print(f'Índice criado: {nome}')
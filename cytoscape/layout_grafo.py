@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# layout_grafo.py
+
+# Posições dos nós do gráfico de rede calculadas no servidor (layout "preset" do Cytoscape),
+# para que o navegador apenas desenhe os elementos, sem recalcular o layout a cada filtro.
+#
+# Cada país sede ocupa um bloco de colunas, na ordem dos países nas vendas de todos os anos e países.
+# Dentro do bloco, as marcas mais vendidas do país ocupam sempre a mesma coluna, então os nós
+# mantêm suas posições quando o filtro muda. Linhas: países, marcas e totais de vendas.
+
+# Importar as bibliotecas necessárias
+from collections import defaultdict
+from funcoes import OutrasMarcas, grafo_marcas_por_pais, id_pais, id_marca, id_total, id_outras_marcas
+
+# Espaçamento, em pixels, entre as colunas e entre as linhas do layout
+espacamento_x = 110
+espacamento_y = 180
+
+# Ordenação de valores que podem ser None (None por último)
+def chave_ordem(valor):
+    return (valor is None, str(valor))
+
+# Ordem de referência dos países e ranking das marcas de cada país pelo total de vendas,
+# calculados a partir das linhas (marca, pais_sede, total_vendas) sem filtro
+def ordem_referencia(linhas_referencia):
+    marcas_por_pais = defaultdict(list)
+    for marca, pais_sede, total_vendas in linhas_referencia:
+        marcas_por_pais[pais_sede].append((marca, total_vendas or 0))
+
+    ranking = {}
+    for pais_sede, marcas in marcas_por_pais.items():
+        marcas.sort(key=lambda linha: (-linha[1], chave_ordem(linha[0])))
+        for posicao, (marca, _) in enumerate(marcas):
+            ranking[(pais_sede, marca)] = posicao
+
+    paises = sorted(marcas_por_pais, key=chave_ordem)
+    quantidade_marcas = {pais_sede: len(marcas) for pais_sede, marcas in marcas_por_pais.items()}
+    return paises, ranking, quantidade_marcas
+
+# Coluna de cada marca exibida dentro do bloco do seu país sede
+def colunas_marcas(pais_sede, marcas, ranking, limite):
+    colunas = {}
+    restantes = []
+    for marca in marcas:
+        if isinstance(marca, OutrasMarcas):
+            # O nó "Outras marcas" fica sempre na última coluna do bloco
+            colunas[marca] = limite
+            continue
+        posicao = ranking.get((pais_sede, marca))
+        if posicao is not None and (limite <= 0 or posicao < limite):
+            colunas[marca] = posicao
+        else:
+            restantes.append(marca)
+
+    # Marcas fora das colunas fixas ocupam as primeiras colunas livres, na ordem de referência
+    ocupadas = set(colunas.values())
+    proxima = 0
+    for marca in sorted(restantes, key=lambda marca: (ranking.get((pais_sede, marca), len(ranking)), chave_ordem(marca))):
+        while proxima in ocupadas:
+            proxima += 1
+        colunas[marca] = proxima
+        ocupadas.add(proxima)
+
+    return colunas
+
+# Calcula as posições {id do nó: {'x', 'y'}} para as linhas exibidas no gráfico
+def calcular_posicoes(linhas, linhas_referencia, limite=grafo_marcas_por_pais):
+    paises_referencia, ranking, quantidade_marcas = ordem_referencia(linhas_referencia)
+
+    marcas_por_pais = defaultdict(list)
+    for marca, pais_sede, _ in linhas:
+        marcas_por_pais[pais_sede].append(marca)
+    paises = paises_referencia + sorted(set(marcas_por_pais) - set(paises_referencia), key=chave_ordem)
+
+    posicoes = {}
+    inicio_bloco = 0
+    for pais_sede in paises:
+        largura = limite + 1 if limite > 0 else max(quantidade_marcas.get(pais_sede, 0), len(marcas_por_pais.get(pais_sede, [])), 1)
+        marcas = marcas_por_pais.get(pais_sede)
+
+        if marcas:
+            for marca, coluna in colunas_marcas(pais_sede, marcas, ranking, limite).items():
+                x = (inicio_bloco + coluna) * espacamento_x
+                if isinstance(marca, OutrasMarcas):
+                    no_marca = id_outras_marcas(pais_sede)
+                    no_total = f'total:{no_marca}'
+                else:
+                    no_marca = id_marca(marca)
+                    no_total = id_total(marca, pais_sede)
+                # Uma marca presente em vários países fica na coluna do primeiro país em que aparece
+                posicoes.setdefault(no_marca, {'x': x, 'y': espacamento_y})
+                posicoes[no_total] = {'x': x, 'y': 2 * espacamento_y}
+
+            if pais_sede is not None:
+                posicoes[id_pais(pais_sede)] = {'x': (inicio_bloco + (largura - 1) / 2) * espacamento_x, 'y': 0}
+
+        inicio_bloco += largura
+
+    return posicoes
+
+# Inclui as posições calculadas nos nós da lista de elementos
+def posicionar(elementos, posicoes):
+    for elemento in elementos:
+        posicao = posicoes.get(elemento['data'].get('id'))
+        if posicao is not None and 'source' not in elemento['data']:
+            elemento['position'] = posicao
+    return elementos
@@ -2,158 +2,188 @@
 # main_app.py
 
 # Importar as bibliotecas necessárias
+import math
+import cache
+import fontes
 import funcoes
+import metricas
+import perfil
 import dash_app
-import pandas as pd
+import diff_grafo
 from db import *
-from dash import Input, Output
-
-# Callback para atualizar a quantidade de países disponíveis
-@dash_app.app.callback(
-    Output('quantidade-paises', 'children'),
-    Input('dropdown-pais-sede', 'options')
-)
-def atualizar_quantidade_paises(opcoes_paises):
-    quantidade_paises = len(opcoes_paises) - 1  # Descontar 1 para excluir a opção "Todos"
-    return quantidade_paises
-
-# Callback para atualizar a quantidade de anos disponíveis
-@dash_app.app.callback(
-    Output('quantidade-anos', 'children'),
-    Input('dropdown-ano', 'options')
-)
-def atualizar_quantidade_anos(opcoes_anos):
-    quantidade_anos = len(opcoes_anos) - 1  # Descontar 1 para excluir a opção "Todos"
-    return quantidade_anos
-
-# Callback para atualizar os elementos do gráfico de rede, a tabela de vendas e a marca selecionada
-# com base na opção selecionada no dropdown de ano e no dropdown de país sede
-@dash_app.app.callback(
-    Output('graph-rede', 'elements'),
-    Output('marca-selecionada', 'children'),
+from flask import Response, jsonify, request, g
+from dash import Input, Output, State, ClientsideFunction, ctx, no_update
+
+# Contadores de acertos e falhas do cache de resultados
+@dash_app.app.server.route('/estatisticas-cache')
+def estatisticas_cache():
+    return jsonify(cache.cache_resultados.estatisticas())
+
+# Métricas por callback (duração, consultas SQL, linhas lidas e bytes da resposta) no formato do Prometheus
+@dash_app.app.server.route('/metrics')
+def exposicao_metricas():
+    return Response(metricas.metricas_callbacks.exposicao(), mimetype='text/plain; version=0.0.4')
+
+# Nome do callback chamado e classe do filtro selecionado, a partir do corpo da requisição do Dash
+def identificar_callback(corpo):
+    callback = dash_app.app.callback_map.get(corpo.get('output'), {}).get('callback')
+    nome = getattr(callback, '__name__', None) or corpo.get('output', '')
+    filtro = next(
+        (item.get('value') or {} for item in corpo.get('inputs', []) if item.get('id') == 'filtro-estado'),
+        {}
+    )
+    return nome, metricas.classe_filtro(filtro.get('ano'), filtro.get('pais'))
+
+# Inicia a medição de cada requisição de callback e a registra com o tamanho da resposta.
+# Requisições com o perfil ativo (perfil.py) não entram nas métricas, pois o cProfile as torna mais lentas.
+@dash_app.app.server.before_request
+def iniciar_metricas_callback():
+    if request.path.endswith('/_dash-update-component'):
+        corpo = request.get_json(silent=True) or {}
+        g.token_metricas = metricas.iniciar_medicao(*identificar_callback(corpo))
+        if perfil.perfil_solicitado(request.headers.get('X-Dash-Perfil'), request.args.get('perfil')):
+            g.perfil = perfil.iniciar_perfil()
+
+@dash_app.app.server.after_request
+def registrar_metricas_callback(resposta):
+    perfil_requisicao = g.pop('perfil', None)
+    token = g.pop('token_metricas', None)
+    if token is not None:
+        medicao = metricas.encerrar_medicao(token)
+        if perfil_requisicao is not None:
+            resposta.headers['X-Dash-Perfil-Arquivo'] = perfil.encerrar_perfil(perfil_requisicao, medicao.callback)
+        else:
+            metricas.metricas_callbacks.registrar(medicao, resposta.calculate_content_length() or 0)
+    return resposta
+
+# Encerra, sem registrar, a medição e o perfil de uma requisição interrompida por uma exceção não tratada
+@dash_app.app.server.teardown_request
+def encerrar_metricas_callback(excecao=None):
+    perfil_requisicao = g.pop('perfil', None)
+    if perfil_requisicao is not None:
+        perfil_requisicao.disable()
+    token = g.pop('token_metricas', None)
+    if token is not None:
+        metricas.encerrar_medicao(token)
+
+# Os dois dropdowns gravam o filtro selecionado em um único store, no navegador (sem requisição ao servidor)
+dash_app.app.clientside_callback(
+    """
+    function(ano_selecionado, pais_selecionado) {
+        return {ano: ano_selecionado, pais: pais_selecionado};
+    }
+    """,
+    Output('filtro-estado', 'data'),
     Input('dropdown-ano', 'value'),
     Input('dropdown-pais-sede', 'value')
 )
-def atualizar_elementos_graficos(ano_selecionado, pais_selecionado):
-    # Monta a cláusula WHERE para a consulta SQL
-    filtros = []
-    if ano_selecionado and ano_selecionado != 'todos':
-        filtros.append(extract('year', Vendas.data_venda) == int(ano_selecionado))
-    if pais_selecionado and pais_selecionado != 'todos':
-        filtros.append(Carro.pais_sede == pais_selecionado)
-
-    # Consulta SQL para recuperar os nós e as arestas com base no ano selecionado e no país sede selecionado
-    consulta = (
-        session.query(
-        Carro.marca,
-        Carro.pais_sede,
-        func.count(Vendas.id_venda)
-        .label('total_vendas'))
-        .join(Vendas, Vendas.id_carro == Carro.id_carro)
-        .filter(*filtros)
-        .group_by(Carro.marca, Carro.pais_sede)
-    )
-
-    # Executa a consulta e recupera os dados atualizados
-    dados_atualizados = consulta.all()
-
-    # Cria uma nova lista de nós e arestas
-    elementos_atualizados = []
-    for marca, pais, total_vendas in dados_atualizados:
-        elementos_atualizados += funcoes.gerar_elemento_grafico(marca, pais, total_vendas)
-
-    return elementos_atualizados, str(ano_selecionado)
 
-# Callback para atualizar as opções do dropdown de países sede com base no ano selecionado
-@dash_app.app.callback(
-    Output('dropdown-pais-sede', 'options'),
-    Input('dropdown-ano', 'value')
-)
-def atualizar_opcoes_paises(ano_selecionado):
-    if ano_selecionado == 'todos':
-        consulta = session.query(Carro.pais_sede).distinct()
-    else:
-        consulta = (
-            session.query(Carro.pais_sede)
-            .filter(Carro.id_carro.in_(
-                session.query(Vendas.id_carro)
-                .filter(extract('year', Vendas.data_venda) == int(ano_selecionado))
-            ))
-            .distinct()
-        )
-
-    return funcoes.gerar_opcoes_dropdown('pais_sede', consulta)
-
-# Callback para atualizar as opções do dropdown de anos com base no país selecionado
-@dash_app.app.callback(
-    Output('dropdown-ano', 'options'),
-    Input('dropdown-pais-sede', 'value')
-)
-def atualizar_opcoes_anos(pais_selecionado):
-    consulta = (
-        session.query(extract('year', Vendas.data_venda).label('ano'))
-        .join(Carro, Vendas.id_carro == Carro.id_carro)
+# Callback único do painel: a partir do filtro (ano, país sede) calcula, em uma única requisição,
+# o gráfico de rede, a marca selecionada, a página visível da tabela de vendas, o total geral,
+# as opções dos dois dropdowns e as quantidades de países e de anos disponíveis.
+# Quando apenas a página ou a ordenação da tabela mudam, somente a tabela é atualizada.
+def atualizar_painel_vendas(filtro, pagina_atual, ordenacao, estado_grafo):
+    ano_selecionado = filtro.get('ano') or 'todos'
+    pais_selecionado = filtro.get('pais') or 'todos'
+    gatilhos = ctx.triggered_prop_ids
+
+    # Uma nova ordenação ou um novo filtro recomeçam a tabela na primeira página
+    if 'tabela-vendas.page_current' not in gatilhos or len(gatilhos) > 1:
+        pagina_atual = 0
+    tabela = atualizar_tabela_vendas(ano_selecionado, pais_selecionado, pagina_atual or 0, ordenacao)
+
+    if gatilhos and set(gatilhos) <= {'tabela-vendas.page_current', 'tabela-vendas.sort_by'}:
+        return (no_update,) * 4 + (tabela, pagina_atual) + (no_update,) * 5
+
+    _, vendas_marca, total_geral = fontes.resumo_vendas(ano_selecionado, pais_selecionado)
+    elementos, estado_grafo = atualizar_elementos_graficos(ano_selecionado, pais_selecionado, estado_grafo)
+    opcoes_paises = fontes.opcoes_paises(ano_selecionado)
+    opcoes_anos = fontes.opcoes_anos(pais_selecionado)
+
+    return (
+        elementos,
+        estado_grafo,
+        str(ano_selecionado),
+        atualizar_total_geral(total_geral),
+        tabela,
+        pagina_atual,
+        max(math.ceil(len(vendas_marca) / dash_app.tabela_tamanho_pagina), 1),
+        opcoes_paises,
+        opcoes_anos,
+        len(opcoes_paises) - 1,  # Descontar 1 para excluir a opção "Todos"
+        len(opcoes_anos) - 1
     )
 
-    if pais_selecionado != 'todos':
-        consulta = consulta.filter(Carro.pais_sede == pais_selecionado)
-
-    consulta = consulta.order_by('ano').distinct()
-
-    return funcoes.gerar_opcoes_dropdown('ano', consulta)
-
-# Callback para atualizar a tabela de vendas com base nas opções selecionadas
-@dash_app.app.callback(
-    Output('tabela-vendas', 'data'),
-    Input('dropdown-ano', 'value'),
-    Input('dropdown-pais-sede', 'value')
-)
-def atualizar_tabela_vendas(ano_selecionado, pais_selecionado):
-    consulta = (
-        session.query(Carro.marca.label('marca'), func.count(Vendas.id_venda).label('total_vendas'))
-        .join(Vendas, Vendas.id_carro == Carro.id_carro)
+# Função para gerar os nós e as arestas do gráfico de rede, já posicionados, para os filtros selecionados.
+# Retorna apenas a diferença em relação ao gráfico do filtro exibido no navegador (estado_grafo),
+# calculada a partir dos dois resultados em cache.
+def atualizar_elementos_graficos(ano_selecionado, pais_selecionado, estado_grafo=None):
+    elementos_anteriores = None
+    if isinstance(estado_grafo, dict) and 'ano' in estado_grafo and 'pais' in estado_grafo:
+        elementos_anteriores = fontes.grafo_vendas(estado_grafo['ano'], estado_grafo['pais'])
+    return diff_grafo.diferenca_grafo(
+        estado_grafo, elementos_anteriores, fontes.grafo_vendas(ano_selecionado, pais_selecionado),
+        ano_selecionado, pais_selecionado
     )
 
-    if ano_selecionado and ano_selecionado != 'todos':
-        consulta = consulta.filter(extract('year', Vendas.data_venda) == int(ano_selecionado))
-
-    if pais_selecionado and pais_selecionado != 'todos':
-        consulta = consulta.filter(Carro.pais_sede == pais_selecionado)
-
-    consulta = consulta.group_by(Carro.marca).order_by(func.count(Vendas.id_venda).desc(), Carro.marca)
-
-    dados_tabela_vendas = consulta.all()
-
-    df = pd.DataFrame(dados_tabela_vendas, columns=['marca', 'total_vendas'])
-
-    return df.to_dict('records')
-
-# Callback para atualizar o total de vendas por marca com base nas opções selecionadas
-@dash_app.app.callback(
-    Output('total-geral', 'children'),
-    Input('dropdown-ano', 'value'),
-    Input('dropdown-pais-sede', 'value')
-)
-def atualizar_total_geral(ano_selecionado, pais_selecionado):
-    consulta = (
-        session.query(
-        func.count(Vendas.id_venda)
-        .label('total_geral'))
-        .join(Vendas, Vendas.id_carro == Carro.id_carro)
+# Coluna e direção da ordenação escolhida na tabela (padrão: total de vendas decrescente)
+def ordenacao_tabela(ordenacao):
+    for item in ordenacao or []:
+        if item.get('column_id') in ('marca', 'total_vendas'):
+            return item['column_id'], item.get('direction') == 'desc'
+    return 'total_vendas', True
+
+# Função para gerar as linhas da página visível da tabela de vendas
+def atualizar_tabela_vendas(ano_selecionado, pais_selecionado, pagina_atual, ordenacao):
+    coluna, decrescente = ordenacao_tabela(ordenacao)
+    linhas = fontes.pagina_vendas_marca(
+        ano_selecionado, pais_selecionado, coluna, decrescente,
+        pagina=pagina_atual, tamanho=dash_app.tabela_tamanho_pagina
     )
-    if ano_selecionado and ano_selecionado != 'todos':
-        consulta = consulta.filter(extract('year', Vendas.data_venda) == int(ano_selecionado))
-
-    if pais_selecionado and pais_selecionado != 'todos':
-        consulta = consulta.filter(Carro.pais_sede == pais_selecionado)
-
-    total_geral = consulta.scalar()
+    return funcoes.gerar_registros_tabela(linhas)
 
+# Função para formatar o total geral de vendas
+def atualizar_total_geral(total_geral):
     if total_geral is not None:
         return f" {total_geral}"
     else:
         return ""
 
+# Registra o painel no servidor ou, no modo cliente, no navegador: os agregados de cubo-cliente são
+# filtrados por assets/painel_cliente.js, com as mesmas saídas do callback do servidor exceto o estado do gráfico
+if dash_app.modo_cliente:
+    dash_app.app.clientside_callback(
+        ClientsideFunction(namespace='painel', function_name='atualizar'),
+        Output('graph-rede', 'elements'),
+        Output('marca-selecionada', 'children'),
+        Output('tabela-vendas', 'data'),
+        Output('total-geral', 'children'),
+        Output('dropdown-pais-sede', 'options'),
+        Output('dropdown-ano', 'options'),
+        Output('quantidade-paises', 'children'),
+        Output('quantidade-anos', 'children'),
+        Input('filtro-estado', 'data'),
+        Input('cubo-cliente', 'data')
+    )
+else:
+    dash_app.app.callback(
+        Output('graph-rede', 'elements'),
+        Output('grafo-estado', 'data'),
+        Output('marca-selecionada', 'children'),
+        Output('total-geral', 'children'),
+        Output('tabela-vendas', 'data'),
+        Output('tabela-vendas', 'page_current'),
+        Output('tabela-vendas', 'page_count'),
+        Output('dropdown-pais-sede', 'options'),
+        Output('dropdown-ano', 'options'),
+        Output('quantidade-paises', 'children'),
+        Output('quantidade-anos', 'children'),
+        Input('filtro-estado', 'data'),
+        Input('tabela-vendas', 'page_current'),
+        Input('tabela-vendas', 'sort_by'),
+        State('grafo-estado', 'data')
+    )(atualizar_painel_vendas)
+
 # Executa o servidor Dash
 if __name__ == '__main__':
     dash_app.app.run_server(port=8055, debug=True)
\ No newline at end of file
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# metricas.py
+
+# Métricas por callback do dashboard: tempo de execução, consultas SQL executadas, linhas lidas do banco
+# e bytes da resposta, separadas por callback e por classe de filtro (sem filtro, ano, país sede ou ambos).
+# Expostas no formato de texto do Prometheus na rota /metrics (main_app.py). Os valores são
+# acumulados em cada processo do servidor, como os contadores de /estatisticas-cache.
+
+# Importar as bibliotecas necessárias
+import time
+import threading
+import contextvars
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Limites (em segundos) dos buckets do histograma de duração dos callbacks
+buckets_duracao = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Medição da requisição em andamento: consultas SQL e linhas lidas enquanto o callback executa
+_medicao = contextvars.ContextVar('medicao_callback', default=None)
+
+class MedicaoCallback:
+
+    def __init__(self, callback, filtro):
+        self.callback = callback
+        self.filtro = filtro
+        self.consultas = 0
+        self.linhas = 0
+        self.inicio = time.perf_counter()
+
+# Inicia a medição de um callback na requisição atual; retorna o token usado para encerrá-la
+def iniciar_medicao(callback, filtro):
+    return _medicao.set(MedicaoCallback(callback, filtro))
+
+# Encerra a medição da requisição atual e retorna a medição encerrada (ou None, se não havia medição)
+def encerrar_medicao(token):
+    medicao = _medicao.get()
+    _medicao.reset(token)
+    return medicao
+
+def registrar_linhas(quantidade):
+    medicao = _medicao.get()
+    if medicao is not None:
+        medicao.linhas += quantidade
+
+# Conta as consultas executadas por qualquer engine durante a medição e as linhas retornadas pelos
+# cursores do cliente. As linhas das consultas transmitidas (db.transmitir) são contadas à medida que são lidas;
+# drivers que não informam rowcount em consultas (como o DuckDB) só têm essas linhas contadas.
+@event.listens_for(Engine, 'after_cursor_execute')
+def contar_consulta(conexao, cursor, instrucao, parametros, contexto, executemany):
+    medicao = _medicao.get()
+    if medicao is None:
+        return
+    medicao.consultas += 1
+    if cursor.description is not None and cursor.rowcount > 0 and not contexto.execution_options.get('stream_results'):
+        medicao.linhas += cursor.rowcount
+
+# Classe do filtro selecionado, usada como rótulo das métricas
+def classe_filtro(ano_selecionado, pais_selecionado):
+    com_ano = bool(ano_selecionado) and ano_selecionado != 'todos'
+    com_pais = bool(pais_selecionado) and pais_selecionado != 'todos'
+    if com_ano and com_pais:
+        return 'ano_pais'
+    if com_ano:
+        return 'ano'
+    if com_pais:
+        return 'pais'
+    return 'todos'
+
+# Valores acumulados por (callback, classe de filtro)
+class MetricasCallbacks:
+
+    def __init__(self, buckets=buckets_duracao):
+        self.buckets = buckets
+        self._series = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, medicao, bytes_resposta):
+        duracao = time.perf_counter() - medicao.inicio
+        with self._trava:
+            serie = self._series.setdefault((medicao.callback, medicao.filtro), {
+                'chamadas': 0,
+                'duracao': 0.0,
+                'buckets': [0] * len(self.buckets),
+                'consultas': 0,
+                'linhas': 0,
+                'bytes': 0,
+            })
+            serie['chamadas'] += 1
+            serie['duracao'] += duracao
+            for indice, limite in enumerate(self.buckets):
+                if duracao <= limite:
+                    serie['buckets'][indice] += 1
+            serie['consultas'] += medicao.consultas
+            serie['linhas'] += medicao.linhas
+            serie['bytes'] += bytes_resposta
+
+    def limpar(self):
+        with self._trava:
+            self._series.clear()
+
+    # Métricas no formato de texto do Prometheus (versão 0.0.4)
+    def exposicao(self):
+        with self._trava:
+            series = {chave: dict(serie, buckets=list(serie['buckets'])) for chave, serie in sorted(self._series.items())}
+
+        def rotulos(callback, filtro, **extras):
+            itens = dict(callback=callback, filtro=filtro, **extras)
+            return '{' + ','.join(f'{nome}="{escapar_rotulo(valor)}"' for nome, valor in itens.items()) + '}'
+
+        linhas = [
+            '# HELP dash_callback_duracao_segundos Tempo de execução das requisições de callback.',
+            '# TYPE dash_callback_duracao_segundos histogram',
+        ]
+        for (callback, filtro), serie in series.items():
+            for limite, quantidade in zip(self.buckets, serie['buckets']):
+                linhas.append(f"dash_callback_duracao_segundos_bucket{rotulos(callback, filtro, le=f'{limite:g}')} {quantidade}")
+            linhas.append(f"dash_callback_duracao_segundos_bucket{rotulos(callback, filtro, le='+Inf')} {serie['chamadas']}")
+            linhas.append(f"dash_callback_duracao_segundos_sum{rotulos(callback, filtro)} {serie['duracao']!r}")
+            linhas.append(f"dash_callback_duracao_segundos_count{rotulos(callback, filtro)} {serie['chamadas']}")
+
+        for nome, campo, descricao in (
+            ('dash_callback_consultas_sql_total', 'consultas', 'Consultas SQL executadas pelos callbacks.'),
+            ('dash_callback_linhas_lidas_total', 'linhas', 'Linhas lidas do banco de dados pelos callbacks.'),
+            ('dash_callback_resposta_bytes_total', 'bytes', 'Bytes das respostas dos callbacks.'),
+        ):
+            linhas.append(f'# HELP {nome} {descricao}')
+            linhas.append(f'# TYPE {nome} counter')
+            for (callback, filtro), serie in series.items():
+                linhas.append(f"{nome}{rotulos(callback, filtro)} {serie[campo]}")
+
+        return '\n'.join(linhas) + '\n'
+
+def escapar_rotulo(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Métricas dos callbacks deste processo
+metricas_callbacks = MetricasCallbacks()
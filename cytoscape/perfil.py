@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# perfil.py
+
+# Perfil sob demanda de uma requisição de callback, para uso em produção sem novo deploy.
+# Habilitado quando DASH_PERFIL_CHAVE está definida: uma requisição ao endpoint de callbacks com o cabeçalho
+# X-Dash-Perfil ou o parâmetro ?perfil= igual à chave é executada sob o cProfile, incluindo a serialização
+# da resposta. As estatísticas são gravadas em DASH_PERFIL_CAMINHO/<callback>/<momento>.pstats, para
+# análise com pstats, snakeviz ou flameprof, junto com um resumo em texto das funções mais demoradas.
+
+# Importar as bibliotecas necessárias
+import os
+import re
+import io
+import uuid
+import pstats
+import cProfile
+from datetime import datetime
+
+perfil_chave = os.environ.get("DASH_PERFIL_CHAVE")
+perfil_caminho = os.environ.get("DASH_PERFIL_CAMINHO", "perfis")
+# Quantidade de funções listadas no resumo em texto, ordenadas pelo tempo acumulado
+perfil_linhas_resumo = int(os.environ.get("DASH_PERFIL_LINHAS_RESUMO", "60"))
+
+# Verifica se a requisição pediu o perfil com a chave configurada
+def perfil_solicitado(cabecalho, parametro):
+    return bool(perfil_chave) and perfil_chave in (cabecalho, parametro)
+
+# Inicia o perfil da requisição; retorna None se outro perfil já estiver ativo nesta thread
+def iniciar_perfil():
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+    except ValueError:
+        return None
+    return perfil
+
+# Encerra o perfil e grava as estatísticas e o resumo do callback; retorna o caminho do arquivo .pstats
+def encerrar_perfil(perfil, callback):
+    perfil.disable()
+    diretorio = os.path.join(perfil_caminho, re.sub(r'[^\w.-]+', '_', callback).strip('_') or 'callback')
+    os.makedirs(diretorio, exist_ok=True)
+    nome = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+    arquivo = os.path.join(diretorio, f'{nome}.pstats')
+    perfil.dump_stats(arquivo)
+
+    resumo = io.StringIO()
+    pstats.Stats(perfil, stream=resumo).sort_stats('cumulative').print_stats(perfil_linhas_resumo)
+    with open(os.path.join(diretorio, f'{nome}.txt'), 'w', encoding='utf-8') as arquivo_resumo:
+        arquivo_resumo.write(resumo.getvalue())
+    return arquivo
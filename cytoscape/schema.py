@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# schema.py
+
+# Cria e atualiza a estrutura do banco de dados usada pelo dashboard.
+# Execute uma vez a cada implantação, antes de iniciar os workers do servidor:
+#   python schema.py
+# A importação de db, funcoes, dash_app e main_app não acessa o banco de dados.
+
+# Importar as bibliotecas necessárias
+import agregados
+import indices
+from db import Base, Vendas, Carro, obter_engine, db_backend
+
+# Cria as tabelas, caso ainda não existam, a tabela de agregados (populada na primeira execução)
+# e os índices ausentes
+def criar_schema():
+    # No DuckDB (DB_BACKEND=duckdb), as tabelas são geradas por sincronizar_duckdb.py
+    # e as consultas colunares não usam os índices do dashboard
+    if db_backend == 'duckdb':
+        return []
+
+    Base.metadata.create_all(obter_engine(), tables=[Carro.__table__, Vendas.__table__])
+    agregados.criar_agregado()
+    return indices.criar_indices()
+
+if __name__ == '__main__':
+    for nome in criar_schema():
+        print(f'Índice criado: {nome}')
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# sincronizar_duckdb.py
+
+# Gera o arquivo do DuckDB lido pelo dashboard quando DB_BACKEND=duckdb: copia as tabelas carros e vendas
+# do PostgreSQL e calcula nele a tabela de agregados. Execute periodicamente (por exemplo via cron):
+#   python sincronizar_duckdb.py
+# O arquivo é montado ao lado do atual e o substitui ao final, então o dashboard continua lendo
+# os dados anteriores durante a sincronização e reabre o arquivo novo na consulta seguinte (db.obter_engine).
+
+# Importar as bibliotecas necessárias
+import os
+import time
+from sqlalchemy import create_engine
+import agregados
+from db import Vendas, Carro, tabela_sincronizacao, db_user, db_pass, db_host, db_data, db_duckdb_caminho, url_duckdb, argumentos_duckdb
+
+# Parâmetro de uma string de conexão do libpq, entre aspas
+def parametro_libpq(chave, valor):
+    valor = str(valor).replace('\\', '\\\\').replace("'", "\\'")
+    return f"{chave}='{valor}'"
+
+# String de conexão do PostgreSQL usada pela extensão postgres do DuckDB
+def conexao_postgresql():
+    parametros = {'host': db_host, 'dbname': db_data, 'user': db_user, 'password': db_pass}
+    return ' '.join(parametro_libpq(chave, valor) for chave, valor in parametros.items() if valor)
+
+# Copia as tabelas do PostgreSQL para um novo arquivo do DuckDB, calcula os agregados
+# e substitui o arquivo lido pelo dashboard
+def sincronizar(caminho=db_duckdb_caminho):
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    caminho_novo = f'{caminho}.novo'
+    if os.path.exists(caminho_novo):
+        os.remove(caminho_novo)
+
+    engine = create_engine(url_duckdb(caminho_novo), connect_args=argumentos_duckdb(somente_leitura=False))
+    try:
+        with engine.begin() as conexao:
+            # A extensão postgres lê as tabelas do PostgreSQL em paralelo, sem passar pelo Python
+            # (exec_driver_sql: a senha pode conter ':' e não deve ser lida como parâmetro)
+            conexao.exec_driver_sql('INSTALL postgres')
+            conexao.exec_driver_sql('LOAD postgres')
+            literal = conexao_postgresql().replace("'", "''")
+            conexao.exec_driver_sql(f"ATTACH '{literal}' AS origem (TYPE postgres, READ_ONLY)")
+            for tabela in (Carro.__table__, Vendas.__table__):
+                colunas = ', '.join(coluna.name for coluna in tabela.columns)
+                conexao.exec_driver_sql(f'CREATE TABLE {tabela.name} AS SELECT {colunas} FROM origem.public.{tabela.name}')
+            conexao.exec_driver_sql('DETACH origem')
+
+        agregados.criar_agregado(engine)
+
+        # Momento da sincronização, lido na marca d'água dos agregados
+        with engine.begin() as conexao:
+            tabela_sincronizacao.create(conexao)
+            conexao.execute(tabela_sincronizacao.insert().values(sincronizado_em=time.time()))
+    finally:
+        engine.dispose()
+
+    os.replace(caminho_novo, caminho)
+
+if __name__ == '__main__':
+    sincronizar()
+    print(f'Arquivo do DuckDB atualizado: {db_duckdb_caminho}')
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# snapshot_parquet.py
+
+# Snapshot das vendas em arquivos Parquet particionados por ano (ano=AAAA/), com as colunas usadas
+# pelo dashboard. Com DASH_FONTE=parquet, os callbacks leem deste snapshot e não do PostgreSQL;
+# as leituras filtradas por ano abrem apenas a partição do ano selecionado (poda de partições).
+# Executado periodicamente (por exemplo via cron) para manter o snapshot atualizado:
+#   python snapshot_parquet.py            acrescenta as vendas com id_venda maior que o da última exportação
+#   python snapshot_parquet.py completo   recria o snapshot (necessário se vendas ou carros forem alterados)
+
+# Importar as bibliotecas necessárias
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import threading
+import pyarrow as pa
+import pyarrow.dataset as ds
+from sqlalchemy import select, cast, extract, INTEGER
+import cache
+import cubo
+import disponibilidade
+from db import Vendas, Carro, Session, transmitir, db_lote_consulta
+
+# Diretório do snapshot e arquivo com o estado da última exportação
+snapshot_caminho = os.environ.get("DASH_PARQUET_CAMINHO", "dados/vendas_parquet")
+arquivo_estado = '_estado.json'
+
+# Colunas gravadas no snapshot; ano é a coluna de partição (diretórios ano=AAAA)
+esquema = pa.schema([
+    ('id_carro', pa.int32()),
+    ('data_venda', pa.date32()),
+    ('valor_venda', pa.decimal128(10, 2)),
+    ('marca', pa.string()),
+    ('pais_sede', pa.string()),
+    ('ano', pa.int32()),
+])
+particionamento = ds.partitioning(pa.schema([('ano', pa.int32())]), flavor='hive')
+
+# Estado da última exportação: maior id_venda exportado e momento da exportação
+def ler_estado(caminho=snapshot_caminho):
+    try:
+        with open(os.path.join(caminho, arquivo_estado)) as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return {'ultimo_id_venda': 0, 'atualizado_em': None}
+
+def gravar_estado(estado, caminho=snapshot_caminho):
+    temporario = os.path.join(caminho, f'{arquivo_estado}.novo')
+    with open(temporario, 'w') as arquivo:
+        json.dump(estado, arquivo)
+    os.replace(temporario, os.path.join(caminho, arquivo_estado))
+
+# Consulta das vendas posteriores a ultimo_id_venda, com a marca e o país sede do carro
+def consulta_snapshot(ultimo_id_venda):
+    ano = cast(extract('year', Vendas.data_venda), INTEGER)
+    return (
+        select(
+            Vendas.id_venda,
+            Vendas.id_carro,
+            Vendas.data_venda,
+            Vendas.valor_venda,
+            Carro.marca,
+            Carro.pais_sede,
+            ano.label('ano'))
+        .select_from(Vendas)
+        .join(Carro, Carro.id_carro == Vendas.id_carro)
+        .where(Vendas.id_venda > ultimo_id_venda)
+        .order_by(Vendas.id_venda)
+    )
+
+# Converte as linhas transmitidas do banco em lotes do Arrow, registrando no estado o maior id_venda lido
+def lotes_snapshot(linhas, estado):
+    colunas = {nome: [] for nome in esquema.names}
+    for linha in linhas:
+        estado['ultimo_id_venda'] = max(estado['ultimo_id_venda'], linha.id_venda)
+        for nome in esquema.names:
+            colunas[nome].append(getattr(linha, nome))
+        if len(colunas['ano']) >= db_lote_consulta:
+            yield pa.RecordBatch.from_pydict(colunas, schema=esquema)
+            colunas = {nome: [] for nome in esquema.names}
+    if colunas['ano']:
+        yield pa.RecordBatch.from_pydict(colunas, schema=esquema)
+
+# Exporta as vendas para o snapshot. Sem completo, grava apenas as vendas novas em novos arquivos
+# das partições; com completo, monta o snapshot em outro diretório e substitui o atual ao final.
+# Os arquivos são gravados primeiro em um diretório de preparação, para que os leitores não vejam
+# uma exportação pela metade.
+def exportar(completo=False, caminho=snapshot_caminho):
+    destino = f'{caminho}.novo' if completo else caminho
+    shutil.rmtree(f'{caminho}.novo', ignore_errors=True)
+    os.makedirs(destino, exist_ok=True)
+
+    estado = {'ultimo_id_venda': 0} if completo else ler_estado(caminho)
+    preparacao = os.path.join(destino, f'_preparacao-{uuid.uuid4().hex}')
+    try:
+        ds.write_dataset(
+            lotes_snapshot(transmitir(consulta_snapshot(estado['ultimo_id_venda'])), estado),
+            preparacao,
+            schema=esquema,
+            format='parquet',
+            partitioning=particionamento,
+            basename_template=f'parte-{uuid.uuid4().hex}-{{i}}.parquet',
+        )
+        # Move os arquivos novos para as partições do snapshot
+        for diretorio, _, arquivos in os.walk(preparacao):
+            particao = os.path.join(destino, os.path.relpath(diretorio, preparacao))
+            for nome in arquivos:
+                os.makedirs(particao, exist_ok=True)
+                os.replace(os.path.join(diretorio, nome), os.path.join(particao, nome))
+    finally:
+        shutil.rmtree(preparacao, ignore_errors=True)
+        Session.remove()
+
+    estado['atualizado_em'] = time.time()
+    gravar_estado(estado, destino)
+
+    if completo:
+        antigo = f'{caminho}.antigo'
+        shutil.rmtree(antigo, ignore_errors=True)
+        if os.path.exists(caminho):
+            os.replace(caminho, antigo)
+        os.replace(destino, caminho)
+        shutil.rmtree(antigo, ignore_errors=True)
+
+    return estado
+
+# Marca d'água do snapshot, usada para invalidar o cache de resultados e reabrir os arquivos
+def marca_dagua():
+    estado = ler_estado()
+    return estado['ultimo_id_venda'], estado['atualizado_em']
+
+# Dataset do snapshot e índice de disponibilidade, recriados quando a marca d'água muda
+# (a lista de arquivos do dataset é lida na criação)
+_dataset = None
+_indice = None
+_marca_dataset = None
+_trava_dataset = threading.Lock()
+
+def obter_dataset():
+    global _dataset, _indice, _marca_dataset
+    marca = cache.cache_resultados.marca_dagua_atual()
+    if _dataset is None or marca != _marca_dataset:
+        with _trava_dataset:
+            if _dataset is None or marca != _marca_dataset:
+                dataset = ds.dataset(
+                    snapshot_caminho, schema=esquema, format='parquet', partitioning=particionamento,
+                    exclude_invalid_files=True, ignore_prefixes=['.', '_']
+                )
+                pares = dataset.to_table(columns=['ano', 'pais_sede']).group_by(['ano', 'pais_sede']).aggregate([])
+                _indice = disponibilidade.IndiceDisponibilidade(zip(pares['ano'].to_pylist(), pares['pais_sede'].to_pylist()))
+                _dataset, _marca_dataset = dataset, marca
+    return _dataset
+
+def obter_indice_disponibilidade():
+    obter_dataset()
+    return _indice
+
+# Monta o filtro de ano (sobre a coluna de partição) e de país sede
+def filtro_snapshot(ano_selecionado=None, pais_selecionado=None):
+    filtro = None
+    if ano_selecionado and ano_selecionado != 'todos':
+        filtro = ds.field('ano') == int(ano_selecionado)
+    if pais_selecionado and pais_selecionado != 'todos':
+        filtro_pais = ds.field('pais_sede') == pais_selecionado
+        filtro = filtro_pais if filtro is None else filtro & filtro_pais
+    return filtro
+
+# Contagem de vendas por (marca, país sede) para os filtros, lendo apenas as colunas necessárias
+def contar_vendas(ano_selecionado, pais_selecionado, colunas=('marca', 'pais_sede')):
+    tabela = obter_dataset().to_table(columns=list(colunas), filter=filtro_snapshot(ano_selecionado, pais_selecionado))
+    contagens = tabela.group_by(list(colunas)).aggregate([([], 'count_all')])
+    return zip(*(contagens[coluna].to_pylist() for coluna in colunas), contagens['count_all'].to_pylist())
+
+# Ordenação de valores que podem ser None (None por último, como no ORDER BY do PostgreSQL)
+def chave_ordem(valor):
+    return (valor is None, valor or '')
+
+# Funções com a mesma interface do módulo agregados, usadas pelos callbacks em main_app.py
+def resumo_vendas(ano_selecionado, pais_selecionado):
+    vendas_marca_pais = sorted(
+        contar_vendas(ano_selecionado, pais_selecionado),
+        key=lambda linha: (-linha[2], chave_ordem(linha[0]), chave_ordem(linha[1]))
+    )
+    totais_marca = {}
+    for marca, _, total in vendas_marca_pais:
+        totais_marca[marca] = totais_marca.get(marca, 0) + total
+    vendas_marca = sorted(totais_marca.items(), key=lambda linha: (-linha[1], chave_ordem(linha[0])))
+    total_geral = sum(totais_marca.values()) if totais_marca else None
+    return vendas_marca_pais, vendas_marca, total_geral
+
+def opcoes_paises(ano_selecionado):
+    return obter_indice_disponibilidade().opcoes_paises(ano_selecionado)
+
+def opcoes_anos(pais_selecionado):
+    return obter_indice_disponibilidade().opcoes_anos(pais_selecionado)
+
+# Cubo (marca, país sede, ano) montado a partir do snapshot, usado no modo cliente
+def carregar_cubo():
+    return cubo.CuboVendas(contar_vendas('todos', 'todos', colunas=('marca', 'pais_sede', 'ano')))
+
+if __name__ == '__main__':
+    estado = exportar(completo=sys.argv[1:2] == ['completo'])
+    print(f"Snapshot atualizado até id_venda {estado['ultimo_id_venda']}: {snapshot_caminho}")
@@ -2,7 +2,10 @@
 # database.py
 
 import os
+import threading
 import psycopg2
+from datetime import date
+from psycopg2.pool import ThreadedConnectionPool, PoolError
 from dotenv import load_dotenv
 
 load_dotenv("/.env")
@@ -11,19 +14,104 @@ db_database = os.environ.get("DB_DATABASE")
 db_user = os.environ.get("DB_USER")
 db_password = os.environ.get("DB_PASSWORD")
 
-# Conexão com o banco de dados PostgreSQL
-conn = psycopg2.connect(
-    host=db_host,
-    database=db_database,
-    user=db_user,
-    password=db_password
-)
+# Quantidade de linhas lidas por vez do cursor no servidor nas consultas transmitidas
+db_lote_consulta = int(os.environ.get("DB_LOTE_CONSULTA", "2000"))
+
+# Tamanho do pool de conexões: dimensione DB_POOL_MAX de acordo com o número de threads do servidor
+db_pool_min = int(os.environ.get("DB_POOL_MIN", "1"))
+db_pool_max = int(os.environ.get("DB_POOL_MAX", "10"))
+# Tempo máximo, em segundos, de espera por uma conexão livre quando todas as DB_POOL_MAX estão em uso
+db_pool_timeout = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+
+# Pool de conexões com o banco de dados PostgreSQL, seguro para uso entre threads.
+# Cada consulta obtém uma conexão própria, então requisições simultâneas rodam em paralelo.
+# O pool é criado na primeira consulta, e não na importação do módulo.
+_pool = None
+_trava_pool = threading.Lock()
+
+# O ThreadedConnectionPool falha (PoolError) em vez de esperar quando não há conexão livre;
+# o semáforo faz as requisições excedentes aguardarem até db_pool_timeout segundos por uma conexão
+_vagas_pool = threading.BoundedSemaphore(db_pool_max)
+
+# Retorna o pool de conexões, criando-o na primeira utilização
+def obter_pool():
+    global _pool
+    if _pool is None:
+        with _trava_pool:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(
+                    db_pool_min,
+                    db_pool_max,
+                    host=db_host,
+                    database=db_database,
+                    user=db_user,
+                    password=db_password
+                )
+    return _pool
+
+# Obtém uma conexão do pool, aguardando uma conexão livre por até db_pool_timeout segundos
+def obter_conexao():
+    if not _vagas_pool.acquire(timeout=db_pool_timeout):
+        raise PoolError(f"Nenhuma conexão livre no pool após {db_pool_timeout} s")
+    try:
+        return obter_pool().getconn()
+    except Exception:
+        _vagas_pool.release()
+        raise
+
+# Devolve a conexão ao pool (ou a fecha, se descartar) e libera a vaga para outra requisição
+def devolver_conexao(conn, descartar=False):
+    try:
+        obter_pool().putconn(conn, close=descartar or conn.closed != 0)
+    finally:
+        _vagas_pool.release()
 
 # Função para executar consultas SQL e retornar os resultados
 def executar_consulta_sql(consulta_sql, params=None):
-    with conn.cursor() as cursor:
-        cursor.execute(consulta_sql, params)
-        return cursor.fetchall()
+    conn = obter_conexao()
+    descartar = False
+    try:
+        # Consultas somente de leitura: sem transação aberta entre requisições
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(consulta_sql, params)
+            return cursor.fetchall()
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        # Conexão quebrada (por exemplo, derrubada pelo servidor): não volta para o pool
+        descartar = True
+        raise
+    finally:
+        devolver_conexao(conn, descartar)
+
+# Função para executar consultas SQL e transmitir os resultados em lotes, sem materializar todas as linhas.
+# Usa um cursor nomeado (cursor no servidor), que busca db_lote_consulta linhas por vez; a conexão
+# volta ao pool quando o resultado termina de ser consumido ou o gerador é fechado.
+def transmitir_consulta_sql(consulta_sql, params=None, lote=None):
+    conn = obter_conexao()
+    descartar = False
+    try:
+        # Cursores nomeados exigem uma transação aberta
+        conn.autocommit = False
+        with conn.cursor(name=f'transmitir_{id(conn)}') as cursor:
+            cursor.itersize = lote or db_lote_consulta
+            cursor.execute(consulta_sql, params)
+            yield from cursor
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        # Conexão quebrada (por exemplo, derrubada pelo servidor): não volta para o pool
+        descartar = True
+        raise
+    finally:
+        # Encerra a transação somente de leitura antes de devolver a conexão
+        if not descartar and conn.closed == 0 and conn.status != psycopg2.extensions.STATUS_READY:
+            conn.rollback()
+        devolver_conexao(conn, descartar)
+
+# Intervalo semiaberto de datas de um ano, usado como
+# "data_venda >= %s AND data_venda < %s" no lugar de EXTRACT(YEAR FROM data_venda) = ano,
+# para que o filtro possa ser resolvido com um índice em data_venda
+def intervalo_ano(ano):
+    ano = int(ano)
+    return date(ano, 1, 1), date(ano + 1, 1, 1)
 
 # Query para recuperar os dados iniciais
 cst_inicial = """
@@ -38,8 +38,10 @@ class Carro(Base):
     # Adicione outras colunas conforme necessário
     vendas = relationship("Venda", backref="carro")  # Relacionamento um para muitos
 
-# Crie as tabelas no banco de dados, caso ainda não existam
-Base.metadata.create_all(engine)
+# Crie as tabelas no banco de dados, caso ainda não existam.
+# Chamada explicitamente (python db_copy.py), e não na importação do módulo.
+def criar_tabelas():
+    Base.metadata.create_all(engine)
 
 # Função para executar consultas SQL utilizando o SQLAlchemy
 def executar_consulta_sql(consulta, params=None):
@@ -47,7 +49,7 @@ def executar_consulta_sql(consulta, params=None):
         result = connection.execute(consulta, params)
         return result.fetchall()
 
-# Exemplo de como utilizar a função para obter os dados iniciais
+# Query para recuperar os dados iniciais
 cst_inicial = """
     SELECT carros.marca, carros.pais_sede, COUNT(*) AS total_vendas
     FROM vendas
@@ -55,27 +57,32 @@ cst_inicial = """
     GROUP BY carros.marca, carros.pais_sede
 """
 
-resultado_inicial = executar_consulta_sql(cst_inicial)
-for marca, pais_sede, total_vendas in resultado_inicial:
-    print(marca, pais_sede, total_vendas)
-
-# Exemplo de como utilizar a função para obter as opções para dropdown Ano das Vendas
+# Query para obter as opções para dropdown Ano das Vendas
 cst_opcoes_dropdown_anos = """
     SELECT DISTINCT EXTRACT(YEAR FROM data_venda) AS ano
     FROM vendas
     ORDER BY ano ASC
 """
 
-resultado_dropdown_anos = executar_consulta_sql(cst_opcoes_dropdown_anos)
-for row in resultado_dropdown_anos:
-    print(row[0])
-
-# Exemplo de como utilizar a função para obter as opções para dropdown Países
+# Query para obter as opções para dropdown Países
 cst_opcoes_dropdown_paises = """
     SELECT DISTINCT pais_sede
     FROM carros
 """
 
-resultado_dropdown_paises = executar_consulta_sql(cst_opcoes_dropdown_paises)
-for row in resultado_dropdown_paises:
-    print(row[0])
+# Exemplo de como criar as tabelas e utilizar a função para obter os dados iniciais
+# e as opções dos dropdowns Ano das Vendas e Países
+if __name__ == '__main__':
+    criar_tabelas()
+
+    resultado_inicial = executar_consulta_sql(cst_inicial)
+    for marca, pais_sede, total_vendas in resultado_inicial:
+        print(marca, pais_sede, total_vendas)
+
+    resultado_dropdown_anos = executar_consulta_sql(cst_opcoes_dropdown_anos)
+    for row in resultado_dropdown_anos:
+        print(row[0])
+
+    resultado_dropdown_paises = executar_consulta_sql(cst_opcoes_dropdown_paises)
+    for row in resultado_dropdown_paises:
+        print(row[0])
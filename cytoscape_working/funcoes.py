@@ -18,8 +18,8 @@ def gerar_elemento_grafico(marca, pais_sede, total_vendas=None):
     return elementos
 
 # Função para gerar as opções do dropdown com base em uma coluna específica da consulta SQL
-def gerar_opcoes_dropdown(coluna, consulta):
-    valores = db.executar_consulta_sql(consulta)
+def gerar_opcoes_dropdown(coluna, consulta, params=None):
+    valores = db.transmitir_consulta_sql(consulta, params)
     valores = [valor[0] for valor in valores if valor[0] is not None]
     valores.sort()
     return [{'label': 'Todos', 'value': 'todos'}] + [{'label': valor, 'value': valor} for valor in valores]
\ No newline at end of file
@@ -2,7 +2,6 @@
 # main_app.py
 
 # Importar as bibliotecas necessárias
-import pandas as pd
 from dash import Input, Output
 import dash_app 
 import db
@@ -39,8 +38,8 @@ def atualizar_elementos_graficos(ano_selecionado, pais_selecionado):
     parametros_where = []
     clausula_condicional = "WHERE TRUE"
     if ano_selecionado != 'todos':
-        clausula_condicional += " AND EXTRACT(YEAR FROM vendas.data_venda) = %s"
-        parametros_where.append(int(ano_selecionado))
+        clausula_condicional += " AND vendas.data_venda >= %s AND vendas.data_venda < %s"
+        parametros_where.extend(db.intervalo_ano(ano_selecionado))
     if pais_selecionado != 'todos':
         clausula_condicional += " AND carros.pais_sede = %s"
         parametros_where.append(pais_selecionado)
@@ -54,10 +53,10 @@ def atualizar_elementos_graficos(ano_selecionado, pais_selecionado):
         GROUP BY carros.marca, carros.pais_sede
     """
 
-    # Executa a consulta e recupera os dados atualizados
-    dados_atualizados = db.executar_consulta_sql(consulta, parametros_where)
+    # Executa a consulta e transmite os dados atualizados em lotes
+    dados_atualizados = db.transmitir_consulta_sql(consulta, parametros_where)
 
-    # Cria uma nova lista de nós e arestas
+    # Cria uma nova lista de nós e arestas à medida que as linhas chegam
     elementos_atualizados = []
     for linha in dados_atualizados:
         elementos_atualizados += funcoes.gerar_elemento_grafico(*linha)
@@ -70,6 +69,7 @@ def atualizar_elementos_graficos(ano_selecionado, pais_selecionado):
     Input('dropdown-ano', 'value')
 )
 def atualizar_opcoes_paises(ano_selecionado):
+    parametros = None
     if ano_selecionado == 'todos':
         consulta = db.cst_opcoes_dropdown_paises
     else:
@@ -78,10 +78,11 @@ def atualizar_opcoes_paises(ano_selecionado):
             WHERE id_carro IN (
                 SELECT id_carro
                 FROM vendas
-                WHERE EXTRACT(YEAR FROM data_venda) = {ano_selecionado}
+                WHERE data_venda >= %s AND data_venda < %s
             )
         """
-    return funcoes.gerar_opcoes_dropdown('pais_sede', consulta)
+        parametros = db.intervalo_ano(ano_selecionado)
+    return funcoes.gerar_opcoes_dropdown('pais_sede', consulta, parametros)
 
 # Callback para atualizar as opções do dropdown de anos com base no país selecionado
 @dash_app.app.callback(
@@ -95,17 +96,19 @@ def atualizar_opcoes_anos(pais_selecionado):
     FROM vendas
     """
 
+    parametros = None
     if pais_selecionado == 'todos':
         consulta = select_1 + """
             ORDER BY ano ASC
         """
     else:
-        consulta = select_1 + f"""
+        consulta = select_1 + """
             INNER JOIN carros ON vendas.id_carro = carros.id_carro
-            WHERE carros.pais_sede = '{pais_selecionado}'
+            WHERE carros.pais_sede = %s
             ORDER BY ano ASC
         """
-    return funcoes.gerar_opcoes_dropdown('ano', consulta)
+        parametros = (pais_selecionado,)
+    return funcoes.gerar_opcoes_dropdown('ano', consulta, parametros)
 
 # Callback para atualizar a tabela de vendas com base nas opções selecionadas
 @dash_app.app.callback(
@@ -121,6 +124,7 @@ def atualizar_tabela_vendas(ano_selecionado, pais_selecionado):
         INNER JOIN carros ON vendas.id_carro = carros.id_carro
         """
 
+    parametros = None
     if ano_selecionado == 'todos' and pais_selecionado == 'todos':
         # Consulta SQL para recuperar o total de vendas por marca para todos os anos e países
         consulta = select_2 + """
@@ -129,32 +133,33 @@ def atualizar_tabela_vendas(ano_selecionado, pais_selecionado):
         """
     elif ano_selecionado == 'todos':
         # Consulta SQL para recuperar o total de vendas por marca para todos os anos e o país selecionado
-        consulta = select_2 + f"""
-            WHERE carros.pais_sede = '{pais_selecionado}'
+        consulta = select_2 + """
+            WHERE carros.pais_sede = %s
             GROUP BY carros.marca
             ORDER BY total_vendas DESC, marca ASC
         """
+        parametros = (pais_selecionado,)
     elif pais_selecionado == 'todos':
         # Consulta SQL para recuperar o total de vendas por marca para o ano selecionado e todos os países
-        consulta = select_2 + f"""
-            WHERE EXTRACT(YEAR FROM vendas.data_venda) = {ano_selecionado}
+        consulta = select_2 + """
+            WHERE vendas.data_venda >= %s AND vendas.data_venda < %s
             GROUP BY carros.marca
             ORDER BY total_vendas DESC, marca ASC
         """
+        parametros = db.intervalo_ano(ano_selecionado)
     else:
         # Consulta SQL para recuperar o total de vendas por marca para o ano selecionado e o país selecionado
-        consulta = select_2 + f"""
-            WHERE EXTRACT(YEAR FROM vendas.data_venda) = {ano_selecionado} AND carros.pais_sede = '{pais_selecionado}'
+        consulta = select_2 + """
+            WHERE vendas.data_venda >= %s AND vendas.data_venda < %s AND carros.pais_sede = %s
             GROUP BY carros.marca
             ORDER BY total_vendas DESC, marca ASC
         """
+        parametros = (*db.intervalo_ano(ano_selecionado), pais_selecionado)
 
-    # Executa a consulta e recupera os dados
-    dados_tabela_vendas = db.executar_consulta_sql(consulta)
-
-    df = pd.DataFrame(dados_tabela_vendas, columns=['marca', 'total_vendas'])
+    # Executa a consulta e gera os registros da tabela à medida que as linhas chegam
+    dados_tabela_vendas = db.transmitir_consulta_sql(consulta, parametros)
 
-    return df.to_dict('records')
+    return [{'marca': marca, 'total_vendas': total_vendas} for marca, total_vendas in dados_tabela_vendas]
 
 # Callback para atualizar o total de vendas por marca com base nas opções selecionadas
 @dash_app.app.callback(
@@ -169,23 +174,27 @@ def atualizar_total_geral(ano_selecionado, pais_selecionado):
         FROM vendas
         INNER JOIN carros ON vendas.id_carro = carros.id_carro
 """
+    parametros = None
     if ano_selecionado == 'todos' and pais_selecionado == 'todos':
         consulta_total_geral = select_3
         
     elif ano_selecionado == 'todos':
-        consulta_total_geral = select_3 + f"""
-            WHERE carros.pais_sede = '{pais_selecionado}'
+        consulta_total_geral = select_3 + """
+            WHERE carros.pais_sede = %s
         """
+        parametros = (pais_selecionado,)
     elif pais_selecionado == 'todos':
-        consulta_total_geral = select_3 + f"""
-            WHERE EXTRACT(YEAR FROM vendas.data_venda) = {ano_selecionado}
+        consulta_total_geral = select_3 + """
+            WHERE vendas.data_venda >= %s AND vendas.data_venda < %s
         """
+        parametros = db.intervalo_ano(ano_selecionado)
     else:
-        consulta_total_geral = select_3 + f"""
-            WHERE EXTRACT(YEAR FROM vendas.data_venda) = {ano_selecionado} AND carros.pais_sede = '{pais_selecionado}'
+        consulta_total_geral = select_3 + """
+            WHERE vendas.data_venda >= %s AND vendas.data_venda < %s AND carros.pais_sede = %s
         """
+        parametros = (*db.intervalo_ano(ano_selecionado), pais_selecionado)
 
-    total_geral = db.executar_consulta_sql(consulta_total_geral)[0][0]
+    total_geral = db.executar_consulta_sql(consulta_total_geral, parametros)[0][0]
     if total_geral is not None:
         return f" {total_geral}"
     else: